@@ -0,0 +1,78 @@
+"""Compare the throughput of sync callers injected with an async provider
+through the injector's bridge against running each call with `asyncio.run`.
+
+    python benchmarks/async_bridge.py --calls 5000 --threads 4
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import diana
+
+
+Client = t.NewType("Client", str)
+
+
+class ClientModule(diana.Module):
+    @diana.provider
+    async def provide_client(self) -> Client:
+        await asyncio.sleep(0)
+        return "client"
+
+
+def throughput(call, calls: int, threads: int) -> float:
+    start = time.perf_counter()
+    if threads == 1:
+        for _ in range(calls):
+            call()
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            for _ in pool.map(lambda _: call(), range(calls)):
+                pass
+    return calls / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    injector = diana.Injector(bridge=True)
+    injector.load(ClientModule())
+
+    @injector
+    def bridged(*, client: Client):
+        return client
+
+    @injector
+    async def handler(*, client: Client):
+        return client
+
+    def per_call():
+        return asyncio.run(handler())
+
+    bridged()
+
+    results = {
+        "bridge": throughput(bridged, args.calls, args.threads),
+        "asyncio.run": throughput(per_call, args.calls, args.threads),
+    }
+    injector.bridge.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            print("{:<12} {:>10.0f} calls/s".format(name, result))
+
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
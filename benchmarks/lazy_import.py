@@ -0,0 +1,118 @@
+"""Compare the start up time of importing and loading every module eagerly
+against registering them lazily from a manifest and resolving one feature.
+
+    python benchmarks/lazy_import.py --modules 200 --providers 20
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+
+MODULE_TEMPLATE = '''
+import typing as t
+import diana
+
+{features}
+
+class Module{index}(diana.Module):
+{providers}
+'''
+
+PROVIDER_TEMPLATE = '''
+    @diana.provider
+    def provide_{name}(self) -> {name}:
+        return {name}("{name}")
+'''
+
+EAGER = '''
+import time
+start = time.perf_counter()
+import diana
+import importlib
+injector = diana.Injector()
+for i in range({modules}):
+    mod = importlib.import_module("benchpkg.mod%d" % i)
+    injector.load(getattr(mod, "Module%d" % i)())
+injector.get(importlib.import_module("benchpkg.mod0").F0_0)
+print(time.perf_counter() - start)
+'''
+
+LAZY = '''
+import time
+start = time.perf_counter()
+import diana
+from diana.manifest import read_manifest
+injector = diana.Injector()
+injector.register_lazy(read_manifest({manifest!r}))
+from benchpkg.mod0 import F0_0
+injector.get(F0_0)
+print(time.perf_counter() - start)
+'''
+
+
+def generate(root, modules, providers):
+    pkg = os.path.join(root, "benchpkg")
+    os.mkdir(pkg)
+    open(os.path.join(pkg, "__init__.py"), "w").close()
+
+    features = {}
+    for i in range(modules):
+        names = ["F{}_{}".format(i, j) for j in range(providers)]
+        source = MODULE_TEMPLATE.format(
+            index=i,
+            features="\n".join(
+                '{0} = t.NewType("{0}", str)'.format(name) for name in names
+            ),
+            providers="".join(PROVIDER_TEMPLATE.format(name=name) for name in names),
+        )
+        with open(os.path.join(pkg, "mod{}.py".format(i)), "w") as f:
+            f.write(source)
+
+        for name in names:
+            path = "benchpkg.mod{0}:Module{0}".format(i)
+            features["benchpkg.mod{}.{}".format(i, name)] = path
+
+    manifest = os.path.join(root, "manifest.json")
+    with open(manifest, "w") as f:
+        json.dump({"version": 1, "features": features}, f)
+    return manifest
+
+
+def run(root, script, repeat):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [root, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+    )
+    # Exclude the cost of compiling the generated package.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, "-c", script], env=env)
+        times.append(float(out))
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--providers", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        manifest = generate(root, args.modules, args.providers)
+        # Warm the bytecode cache.
+        run(root, EAGER.format(modules=args.modules), 1)
+
+        eager = run(root, EAGER.format(modules=args.modules), args.repeat)
+        lazy = run(root, LAZY.format(manifest=manifest), args.repeat)
+
+    print("eager: {:.4f}s".format(eager))
+    print("lazy:  {:.4f}s ({:.1f}x)".format(lazy, eager / lazy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare the start up time of importing modules of providers and injected
+functions with and without an activated manifest.
+
+    python benchmarks/manifest_startup.py --modules 100 --functions 50
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+from lazy_import import run
+
+
+MODULE_TEMPLATE = '''
+import typing as t
+import diana
+
+injector = diana.injector
+
+{features}
+
+class Module{index}(diana.Module):
+{providers}
+
+{functions}
+'''
+
+PROVIDER_TEMPLATE = '''
+    @diana.provider
+    def provide_{name}(self) -> {name}:
+        return {name}("{name}")
+'''
+
+FUNCTION_TEMPLATE = '''
+@injector
+def handle_{index}(request, retries=3, *, a: {a}, b: {b}, verbose=False):
+    return request
+'''
+
+IMPORT = '''
+import time
+start = time.perf_counter()
+import diana
+import diana.manifest
+{activate}
+import importlib
+for i in range({modules}):
+    importlib.import_module("benchpkg.mod%d" % i)
+print(time.perf_counter() - start)
+'''
+
+
+def generate(root, modules, functions):
+    pkg = os.path.join(root, "benchpkg")
+    os.mkdir(pkg)
+    open(os.path.join(pkg, "__init__.py"), "w").close()
+
+    for i in range(modules):
+        names = ["F{}_{}".format(i, j) for j in range(2)]
+        source = MODULE_TEMPLATE.format(
+            index=i,
+            features="\n".join(
+                '{0} = t.NewType("{0}", str)'.format(name) for name in names
+            ),
+            providers="".join(PROVIDER_TEMPLATE.format(name=name) for name in names),
+            functions="".join(
+                FUNCTION_TEMPLATE.format(index=j, a=names[0], b=names[1])
+                for j in range(functions)
+            ),
+        )
+        with open(os.path.join(pkg, "mod{}.py".format(i)), "w") as f:
+            f.write(source)
+
+    manifest = os.path.join(root, "manifest.json")
+    argv = [sys.executable, "-m", "diana", "manifest", "-o", manifest]
+    argv += ["benchpkg.mod{0}:Module{0}".format(i) for i in range(modules)]
+    for i in range(modules):
+        argv += ["--scan", "benchpkg.mod{}".format(i)]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [root, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+    )
+    subprocess.check_call(argv, env=env)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", type=int, default=100)
+    parser.add_argument("--functions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        manifest = generate(root, args.modules, args.functions)
+        live = IMPORT.format(modules=args.modules, activate="")
+        activated = IMPORT.format(
+            modules=args.modules,
+            activate="diana.manifest.activate({!r})".format(manifest),
+        )
+        # Warm the bytecode cache.
+        run(root, live, 1)
+
+        live = run(root, live, args.repeat)
+        activated = run(root, activated, args.repeat)
+
+    print("inspected: {:.4f}s".format(live))
+    print("manifest:  {:.4f}s ({:.1f}x)".format(activated, live / activated))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the cost of calling injected methods against the same methods
+without injection, given their dependencies explicitly.
+
+    python benchmarks/method_call.py --number 200000
+"""
+import sys
+import json
+import timeit
+import argparse
+import typing as t
+
+import diana
+
+
+Dependency = t.NewType("Dependency", str)
+
+
+class BenchModule(diana.Module):
+    @diana.provider
+    def provide(self) -> Dependency:
+        return "dependency"
+
+
+def build(injector):
+    class Service(object):
+        def plain(self, *, dep):
+            return dep
+
+        @injector
+        def method(self, *, dep: Dependency):
+            return dep
+
+        @injector
+        @classmethod
+        def class_method(cls, *, dep: Dependency):
+            return dep
+
+        @injector
+        @staticmethod
+        def static_method(*, dep: Dependency):
+            return dep
+
+    return Service()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    injector = diana.Injector()
+    injector.load(BenchModule())
+    service = build(injector)
+
+    frozen = diana.Injector()
+    frozen.load(BenchModule())
+    frozen_service = build(frozen)
+    frozen.freeze()
+
+    cases = {
+        "uninjected": lambda: service.plain(dep="dependency"),
+        # Accessing the methods on each call, so binding is measured too.
+        "method": lambda: service.method(),
+        "method (explicit)": lambda: service.method(dep="dependency"),
+        "classmethod": lambda: service.class_method(),
+        "staticmethod": lambda: service.static_method(),
+        "method (frozen)": lambda: frozen_service.method(),
+    }
+
+    results = {}
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=args.number, repeat=args.repeat))
+        results[name] = best / args.number * 1e9
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        base = results["uninjected"]
+        for name, ns in results.items():
+            print("{:<20} {:>8.0f} ns/call  {:>6.1f}x".format(name, ns, ns / base))
+
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+"""Measure how the throughput of sync injected calls scales with the number
+of threads making them.
+
+    python benchmarks/thread_scaling.py --max-threads 8 --calls 200000
+
+Calls only scale with threads on free-threaded builds of CPython (3.13t and
+later); with the GIL, throughput stays roughly flat.
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+
+from diana.loadtest import build
+
+
+ROW = "{threads:>7}  {throughput:>10.0f}  {speedup:>7.2f}  {efficiency:>10.0%}"
+
+def gil_enabled() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def measure(caller, threads: int, calls: int) -> float:
+    """Calls per second with `threads` threads each making `calls` calls."""
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for _ in range(calls):
+            caller()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    return threads * calls / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--context-ratio", type=float, default=0.2)
+    parser.add_argument("--max-threads", type=int, default=8)
+    parser.add_argument(
+        "--calls", type=int, default=100000, help="Calls made by each thread"
+    )
+    parser.add_argument("--freeze", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    graph = build(
+        features=args.features, async_ratio=0.0, context_ratio=args.context_ratio
+    )
+    if args.freeze:
+        graph.injector.freeze()
+
+    # Warm up.
+    measure(graph.sync_caller, 1, 1000)
+
+    results = []
+    for threads in range(1, args.max_threads + 1):
+        throughput = measure(graph.sync_caller, threads, args.calls)
+        results.append({"threads": threads, "throughput": throughput})
+
+    base = results[0]["throughput"]
+    for result in results:
+        result["speedup"] = result["throughput"] / base
+        result["efficiency"] = result["speedup"] / result["threads"]
+
+    report = {"gil": gil_enabled(), "results": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("GIL enabled: {}".format(report["gil"]))
+        print("threads  calls/s     speedup  efficiency")
+        for result in results:
+            print(ROW.format(**result))
+
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
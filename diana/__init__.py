@@ -1,5 +1,9 @@
-from .injector import Injector, NoProvider  # noqa
-from .module import Module, provider, contextprovider, provides  # noqa
+from .injector import Injector, NoProvider, InjectorFrozen  # noqa
+from .module import Module, provider, contextprovider, provides, sharedprovider  # noqa
+from .refresh import refresh  # noqa
+from .timeout import ProviderTimeout, deadline  # noqa
+from . import manifest  # noqa
+from .util import ConcurrentErrors  # noqa
 
 __version__ = "3.1.3"
 
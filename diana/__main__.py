@@ -0,0 +1,27 @@
+"""Command line tools.
+
+    python -m diana manifest pkg.modules:DatabaseModule -o manifest.json
+
+`diana.manifest` is imported by the package itself, so its command is run
+from here rather than with `python -m diana.manifest`.
+"""
+import sys
+import typing as t
+
+from . import manifest
+
+
+COMMANDS = {"manifest": manifest.main}
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS:
+        sys.exit(
+            "usage: python -m diana {{{}}} ...".format(",".join(sorted(COMMANDS)))
+        )
+    COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    main()
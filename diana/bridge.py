@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+import typing as t
+
+
+class Bridge(object):
+    """Runs awaitables for sync callers on an event loop in a background
+    thread, which is started on first use and reused by every call.
+
+    Awaitables run in a copy of the caller's context, so overrides and
+    other context variables set by the caller apply.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="diana-bridge", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run(self, aw: t.Awaitable) -> t.Any:
+        """Wait for the result of `aw`, run on the bridge's event loop."""
+        loop = self._loop or self._start()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Can not wait for the bridge from its own event loop")
+
+        future = concurrent.futures.Future()
+        loop.call_soon_threadsafe(
+            self._schedule, aw, future, context=contextvars.copy_context()
+        )
+        return future.result()
+
+    @staticmethod
+    def _schedule(aw, future: concurrent.futures.Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        task = asyncio.ensure_future(aw)
+
+        def done(task):
+            if task.cancelled():
+                future.set_exception(concurrent.futures.CancelledError())
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        task.add_done_callback(done)
+
+    def close(self) -> None:
+        """Stop the event loop. It is restarted if the bridge is used
+        again."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+class BridgedContext(object):
+    """Sync context manager entering and exiting the async context manager
+    `cm` through `bridge`."""
+
+    def __init__(self, cm, bridge: Bridge):
+        self.cm = cm
+        self.bridge = bridge
+
+    def __enter__(self):
+        return self.bridge.run(self.cm.__aenter__())
+
+    def __exit__(self, exc_type, exc, tb):
+        return self.bridge.run(self.cm.__aexit__(exc_type, exc, tb))
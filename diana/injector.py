@@ -1,12 +1,34 @@
+import copy
 import inspect
 import functools
 import asyncio
+import threading
 import typing as t
 import contextlib
+import contextvars
+import collections
+import logging
+import time
 import types
-
-from .module import Module
-from .util import isasync
+import weakref
+import operator
+
+from .module import Module, singleton
+from .manifest import (
+    feature_id,
+    import_path,
+    precomputed,
+    precomputed_defaults,
+    precomputed_dependencies,
+)
+from .timeout import ProviderTimeout, TimedContext, timed, remaining
+from .limits import Limiter
+from .teardown import Teardown, DeferredExit
+from .sampling import Sampler
+from .subtypes import SubtypeIndex
+from .bridge import Bridge, BridgedContext
+from .scope import Scope, scope_key, resolved, _MISSING
+from .util import isasync, gather, raise_errors, AsyncContextGroup
 
 
 FuncType = t.Callable[..., t.Any]
@@ -14,11 +36,22 @@ Decorator = t.Callable[[FuncType], FuncType]
 
 UNSET = inspect.Parameter.empty
 
+_NO_VALUES = types.MappingProxyType({})
+_NO_PARAMS = types.MappingProxyType({})
+
+_NO_TIMEOUT = (None, False)
+
+logger = logging.getLogger(__name__)
+
 
 class NoProvider(RuntimeError):
     pass
 
 
+class InjectorFrozen(RuntimeError):
+    pass
+
+
 class Injector(object):
     # modules: t.List[Module]
     # providers: SyncProviderMap
@@ -28,20 +61,87 @@ class Injector(object):
         self,
         _sync_dep_klass: t.Type["Dependency"] = None,
         _async_dep_klass: t.Type["Dependency"] = None,
+        concurrent: bool = False,
+        subtypes: bool = False,
+        bridge: bool = False,
     ):
+        """
+        If `concurrent` is set, the async dependencies of an async function
+        are resolved concurrently, and async context dependencies are
+        entered and exited together rather than one after another.
+
+        If `subtypes` is set, features without a provider of their own are
+        provided by the provider of a subclass or, for `typing.Protocol`
+        features, of a class implementing them, see `SubtypeIndex`.
+
+        If `bridge` is set, sync functions (and `get`) can be injected with
+        features that only have async providers. The providers are run on an
+        event loop in a background thread, see `diana.bridge.Bridge`.
+        """
         self.modules = []
         self.providers = {}
         self.async_providers = {}
+        self.multi_providers = {}
+        self.values = {}
+
+        # Values bound with `bind`, which take precedence over modules.
+        self._bindings = {}
+
+        # The features returned by `Module.aload`, for each started module.
+        self._started = {}
+
+        # The (sync, async) provider maps overriding the loaded providers
+        # in the current context, see `override`.
+        self._overrides = contextvars.ContextVar(
+            "diana_overrides_{}".format(id(self)), default=None
+        )
 
         self._sync_dep = _sync_dep_klass or Dependencies
         self._async_dep = _async_dep_klass or AsyncDependencies
 
+        # The `pkg.module:ModuleClass` paths of modules to load the first
+        # time one of their features is needed, by feature id.
+        self._lazy = {}
+        self._lazy_lock = threading.RLock()
+
+        # Limiters for the providers with concurrency limits, by
+        # (module, provider).
+        self._limiters = {}
+
+        # Exits the contexts of providers marked `deferred_exit`.
+        self.teardown = Teardown()
+
+        # The number of times each feature's async provider timed out.
+        self.timeout_counts = collections.Counter()
+
+        # Measures a sample of injected calls, see `sample`.
+        self.sampler = None
+
+        # Every function wrapped by this injector, see `freeze`.
+        self._dependents = weakref.WeakSet()
+        self.frozen = False
+
+        self.concurrent = concurrent
+
+        # Indexes of the sync and async providers that provide features as
+        # subtypes, if enabled.
+        self._subtypes = (SubtypeIndex(), SubtypeIndex()) if subtypes else None
+
+        # Resolves async providers for sync callers, if enabled.
+        self.bridge = Bridge() if bridge else None
+
+        # The `Scope` of the current context, see `scope`.
+        self._scope = contextvars.ContextVar(
+            "diana_scope_{}".format(id(self)), default=None
+        )
+
     def load(self, *modules: Module):
         """Load the given modules in the provided order.
 
         Any providers in the modules will take precedence over
         any already loaded providers.
         """
+        self._check_frozen()
         for module in modules:
             module.load(self)
             self._load_module(module)
@@ -52,27 +152,324 @@ class Injector(object):
         If the module is not loaded, nothing will happen.
 
         Any providers that have been superceded by providers in the
-        unloaded module will be reinstated.
+        unloaded module will be reinstated. Waits for deferred sync context
+        exits to complete first; use `aunload` to also wait for async ones.
         """
-        keep = self.modules[:]
-        self.modules = []
-
-        self.providers = {}
-        self.async_providers = {}
-
-        for m in keep:
+        self._check_frozen()
+        self.teardown.drain()
+        keep = []
+        for m in self.modules:
             if m in modules:
                 m.unload(self)
-                continue
-            self._load_module(m)
+                self._release(m)
+                self._started.pop(m, None)
+                for key in [k for k in self._limiters if k[0] is m]:
+                    del self._limiters[key]
+            else:
+                keep.append(m)
+
+        self._reload(keep)
+
+        if self._subtypes is not None:
+            for m in modules:
+                self._subtypes[0].unloaded(m.providers)
+                self._subtypes[1].unloaded(m.async_providers)
+
+    def _reload(self, modules: t.List[Module]) -> None:
+        """Reload `modules`, in order, into new maps, and only then replace
+        the current ones, so concurrent lookups never see them partially
+        loaded."""
+        maps = ({}, {}, {}, dict(self._bindings))
+        for m in modules:
+            self._load_module(m, maps)
+
+        self.providers, self.async_providers, self.multi_providers, self.values = maps
+        self.modules = modules
+
+    def _release(self, module: Module) -> None:
+        """Release the resources held by the providers of `module`."""
+        providers = list(module.providers.values())
+        providers.extend(module.async_providers.values())
+        for contributions in module.multi_providers.values():
+            providers.extend(contributions)
+
+        for provider in providers:
+            release = getattr(provider, "__release__", None)
+            if release is not None:
+                release(module)
+
+    async def aload(self, *modules: Module) -> None:
+        """Load the given modules, starting them concurrently.
+
+        Each module's `load` and `aload` hooks are run as soon as the
+        modules listed in its `requires` have been started, and each module
+        is loaded as soon as it has started, so the hooks of the modules
+        requiring it can use its features. Once all of them have started,
+        their providers take precedence in the provided order.
+
+        If any module fails to start, the modules that did start are
+        stopped and unloaded again, the `unload` hook of every module whose
+        `load` hook ran is run, and the error is raised.
+        """
+        self._check_frozen()
+        # Modules whose `load` hook ran, even if their `aload` failed.
+        loaded = []
+        started, errors = await self._run_ordered(
+            modules, functools.partial(self._start_module, loaded=loaded)
+        )
+        if errors:
+            await self._run_ordered(started, self._stop_module, reverse=True)
+            self.unload(*started)
+            for module in loaded:
+                if module not in started:
+                    module.unload(self)
+            raise_errors(errors)
+
+        # The modules were loaded in the order they started.
+        self._reload([m for m in self.modules if m not in modules] + list(modules))
+        if self._subtypes is not None:
+            self._subtypes = (SubtypeIndex(), SubtypeIndex())
+
+    async def aunload(self, *modules: Module) -> None:
+        """Unload the given modules, stopping them concurrently.
+
+        A module's `aunload` hook is run only after the hooks of any
+        unloading modules that require it have completed, and after any
+        deferred context exits have completed.
+        """
+        self._check_frozen()
+        await self.teardown.adrain()
+        unloading = [m for m in self.modules if m in modules]
+        _, errors = await self._run_ordered(
+            unloading, self._stop_module, reverse=True
+        )
+        self.unload(*unloading)
+        if errors:
+            raise_errors(errors)
+
+    async def _start_module(self, module: Module, loaded: t.List[Module]) -> None:
+        module.load(self)
+        loaded.append(module)
+        features = await module.aload(self)
+        if features:
+            self._started[module] = dict(features)
+        self._load_module(module)
+
+    async def _stop_module(self, module: Module) -> None:
+        await module.aunload(self)
+
+    async def _run_ordered(self, modules, func, reverse=False):
+        """Run `func` concurrently for each module, respecting the order
+        declared by `Module.requires`.
+
+        Returns the modules `func` completed for, and any errors raised.
+        """
+        waits = {
+            m: [o for o in modules if o is not m and isinstance(o, tuple(m.requires))]
+            for m in modules
+        }
+        if reverse:
+            waits = {m: [o for o in modules if m in waits[o]] for m in modules}
+
+        async def run(module, before):
+            await asyncio.gather(*before)
+            await func(module)
+
+        tasks = {}
+        for module in _ordered(waits):
+            tasks[module] = asyncio.ensure_future(
+                run(module, [tasks[o] for o in waits[module]])
+            )
+
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        done, errors = [], []
+        for module, result in zip(tasks, results):
+            if not isinstance(result, BaseException):
+                done.append(module)
+            elif not any(result is e for e in errors):
+                errors.append(result)
+
+        return done, errors
+
+    def _load_module(self, module: Module, maps=None) -> None:
+        """Add the providers and values of `module` to `maps`, the
+        (providers, async_providers, multi_providers, values) maps of the
+        injector, by default."""
+        reloading = maps is not None
+        if not reloading:
+            self.modules.append(module)
+            maps = self._maps()
+        providers, async_providers, multi_providers, values = maps
+        bindings = self._bindings
 
-    def _load_module(self, module: Module) -> None:
-        self.modules.append(module)
         for feature, provider in module.providers.items():
-            self.providers[feature] = (module, provider)
+            if feature not in bindings:
+                providers[feature] = (module, self._prepare(module, provider))
+                values.pop(feature, None)
 
         for feature, provider in module.async_providers.items():
-            self.async_providers[feature] = (module, provider)
+            if feature not in bindings:
+                async_providers[feature] = (module, self._prepare(module, provider))
+
+        for feature, contributions in module.multi_providers.items():
+            multi_providers.setdefault(t.Sequence[feature], []).extend(
+                (module, self._prepare(module, provider)) for provider in contributions
+            )
+
+        if self._subtypes is not None and not reloading:
+            for index, provided in zip(
+                self._subtypes, (module.providers, module.async_providers)
+            ):
+                index.loaded(f for f in provided if f not in bindings)
+
+        module_values = dict(module.values)
+        module_values.update(self._started.get(module, {}))
+        for feature, value in module_values.items():
+            if feature not in bindings:
+                self._bind(feature, value, maps)
+
+    def _maps(self):
+        return self.providers, self.async_providers, self.multi_providers, self.values
+
+    def _prepare(self, module: Module, provider):
+        """Wrap `provider` to enforce its options when loading `module`."""
+        max_concurrency = getattr(provider, "__maxconcurrency__", None)
+        coalesce = getattr(provider, "__coalesce__", False)
+        if max_concurrency is not None or coalesce:
+            # Reuse the limiter when reloading, so its limit stays shared.
+            key = (module, provider)
+            if key not in self._limiters:
+                self._limiters[key] = Limiter(provider, max_concurrency, coalesce)
+            provider = self._limiters[key]
+
+        if getattr(provider, "__deferredexit__", False):
+            provider = DeferredExit(provider, self.teardown)
+        return provider
+
+    def bind(self, feature, value) -> None:
+        """Provide `value` for `feature`.
+
+        Bound values are injected as they are, without calling a provider,
+        and take precedence over the providers of any loaded module.
+        """
+        self._check_frozen()
+        self._bindings[feature] = value
+        self._bind(feature, value)
+
+    def register_lazy(self, features: t.Mapping[t.Any, str]) -> None:
+        """Register modules to be imported and loaded the first time one of
+        their features can't otherwise be resolved.
+
+        `features` maps features (or their `diana.manifest.feature_id`) to
+        the `pkg.module:ModuleClass` path of the module providing them. A
+        manifest from `diana.manifest.build_manifest` can be passed as is.
+
+        >>>
+        >>> injector.register_lazy({Frob: "frobs.modules:FrobModule"})
+        >>>
+        """
+        self._check_frozen()
+        if "version" in features and "features" in features:
+            features = features["features"]
+
+        for feature, path in features.items():
+            if not isinstance(feature, str):
+                feature = feature_id(feature)
+            self._lazy[feature] = path
+
+    def register_entry_points(self, group: str = "diana.modules") -> None:
+        """Register the modules advertised by installed packages as lazy.
+
+        Each entry point in `group` is named after the feature id, and
+        refers to the module class providing it:
+
+            [options.entry_points]
+            diana.modules =
+                frobs.types.Frob = frobs.modules:FrobModule
+        """
+        try:
+            from importlib import metadata
+        except ImportError:  # Python < 3.8
+            import importlib_metadata as metadata
+
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            entry_points = entry_points.select(group=group)
+        else:
+            entry_points = entry_points.get(group, [])
+
+        self.register_lazy({ep.name: ep.value for ep in entry_points})
+
+    def _load_lazy(self, feature) -> bool:
+        """Load the lazily registered module providing `feature`.
+
+        Returns whether the lookup for `feature` should be retried."""
+        key = feature_id(feature)
+        if key not in self._lazy:
+            return False
+
+        with self._lazy_lock:
+            path = self._lazy.get(key)
+            # Another thread may have loaded it while we waited.
+            if path is not None:
+                self._load_lazy_path(path)
+        return True
+
+    def _load_lazy_path(self, path: str) -> None:
+        self.load(import_path(path)())
+        for key in [k for k, p in self._lazy.items() if p == path]:
+            del self._lazy[key]
+
+    def freeze(self) -> t.Dict[str, int]:
+        """Prevent any further changes to the loaded modules, and specialize
+        every injected function for them.
+
+        Any lazily registered modules are loaded first.
+
+        Once frozen, loading, unloading, binding or overriding raises
+        `InjectorFrozen`. Injected functions look up their providers once,
+        rather than on every call, and skip the lookups entirely for bound
+        values and features without a provider.
+
+        Returns (and logs) a summary of how many injected functions were
+        specialized.
+        """
+        if not self.frozen:
+            with self._lazy_lock:
+                for path in set(self._lazy.values()):
+                    self._load_lazy_path(path)
+
+            self.modules = tuple(self.modules)
+            self.providers = types.MappingProxyType(self.providers)
+            self.async_providers = types.MappingProxyType(self.async_providers)
+            self.multi_providers = types.MappingProxyType(self.multi_providers)
+            self.values = types.MappingProxyType(self.values)
+            self.frozen = True
+
+        dependents = list(self._dependents)
+        specialized = sum(1 for d in dependents if d.specialize())
+        summary = {
+            "modules": len(self.modules),
+            "functions": len(dependents),
+            "specialized": specialized,
+        }
+        logger.info(
+            "Froze injector with %(modules)d modules, specialized "
+            "%(specialized)d of %(functions)d injected functions",
+            summary,
+        )
+        return summary
+
+    def _check_frozen(self) -> None:
+        if self.frozen:
+            raise InjectorFrozen("Injector {!r} is frozen".format(self))
+
+    def _bind(self, feature, value, maps=None) -> None:
+        providers, async_providers, _, values = maps or self._maps()
+        values[feature] = value
+        providers.pop(feature, None)
+        async_providers.pop(feature, None)
 
     def wrap_dependent(self, func: FuncType) -> FuncType:
         """Wrap a function to have it's dependencies injected.
@@ -81,7 +478,17 @@ class Injector(object):
         used to manage dependencies and parameters for the wrapped function.
 
         Note: This does not specify which dependencies to inject.
+
+        Wrapping a class wraps its `__init__`, and returns the class.
+        Wrapping a `classmethod` or `staticmethod` wraps the underlying
+        function.
         """
+        if inspect.isclass(func):
+            return self._wrap_class(func)
+        if isinstance(func, (classmethod, staticmethod)):
+            wrapped = type(func)(self.wrap_dependent(func.__func__))
+            wrapped.__dependencies__ = wrapped.__func__.__dependencies__
+            return wrapped
         if hasattr(func, "__dependencies__"):
             return func
 
@@ -90,15 +497,23 @@ class Injector(object):
         else:
             klass = self._sync_dep
 
-        injected = klass(self, func)
+        return self._wrap(klass(self, func))
 
-        @functools.wraps(func)
-        def wrapped(*args, **kwargs):
-            return injected.call_injected(*args, **kwargs)
-
-        wrapped.__dependencies__ = injected
+    def _wrap_class(self, cls: type) -> type:
+        if "__dependencies__" not in cls.__dict__:
+            inherited = getattr(cls.__init__, "__dependencies__", None)
+            if inherited is not None and "__init__" not in cls.__dict__:
+                # Subclasses of injected classes get their own copy of the
+                # inherited dependencies, so they can add to them.
+                cls.__init__ = self._wrap(inherited.copy(self))
+            else:
+                cls.__init__ = self.wrap_dependent(cls.__init__)
+            cls.__dependencies__ = cls.__init__.__dependencies__
+        return cls
 
-        return wrapped
+    def _wrap(self, injected: "Dependencies") -> "InjectedFunction":
+        self._dependents.add(injected)
+        return InjectedFunction(self, injected)
 
     def __call__(self, func: FuncType) -> FuncType:
         """Wrap a function and attempt to discover it's dependencies by
@@ -109,11 +524,35 @@ class Injector(object):
         >>> def my_func(*, a_frob: Frob):
         >>>     assert isinstance(a_frob, Frob)
         >>>
+
+        Classes have the kwarg-only arguments of their `__init__` injected
+        once, when they are constructed.
+
+        >>>
+        >>> @injector
+        >>> class FrobService:
+        >>>     def __init__(self, *, a_frob: Frob):
+        >>>         self.a_frob = a_frob
+        >>>
         """
         func = self.wrap_dependent(func)
         func.__dependencies__.inspect_dependencies()
         return func
 
+    def attribute(self, __feature=None, **params) -> "InjectedAttribute":
+        """An attribute resolved the first time it is accessed on each
+        instance, and then cached on it.
+
+        >>>
+        >>> class FrobService:
+        >>>     a_frob: Frob = injector.attribute(frobulation='high')
+        >>>
+
+        The feature is taken from the attribute's annotation, unless given
+        as the first argument.
+        """
+        return InjectedAttribute(self, __feature, params)
+
     def inject(self, **mapping) -> Decorator:
         """Wrap a function and specify which dependencies to inject on which
         kwargs.
@@ -162,44 +601,582 @@ class Injector(object):
 
         return wrapper
 
-    def _get(self, feature, params=None, default=UNSET):
-        """Get the resolved dependency for `feature`."""
-        params = params or {}
+    def timeout(self, kwarg, seconds: float, fallback: bool = False) -> Decorator:
+        """Bound the time the async provider of a dependency can take.
 
-        provider_map = self.providers
-        if feature not in provider_map:
-            if default is UNSET:
-                raise NoProvider("No provider for {!r}".format(feature))
-            else:
-                return default, False
+        >>>
+        >>> @injector
+        >>> @injector.timeout('a_frob', 0.5, fallback=True)
+        >>> async def my_func(*, a_frob: Frob = None):
+        >>>     ...
+        >>>
+
+        If the provider takes longer, `diana.ProviderTimeout` is raised.
+        With `fallback`, the dependency is instead resolved as if there
+        were no async provider: from a sync provider, or the default.
+        """
+
+        def wrapper(func: FuncType) -> FuncType:
+            func = self.wrap_dependent(func)
+            func.__dependencies__.add_timeout(kwarg, seconds, fallback)
+            return func
+
+        return wrapper
+
+    def sample(self, every: int = 100, **options) -> Sampler:
+        """Measure the injection overhead of 1 in `every` injected calls.
+
+        >>>
+        >>> injector.sample(1000, export=send_metrics, interval=60)
+        >>>
+
+        Returns the `diana.sampling.Sampler` aggregating the measurements.
+        Set `injector.sampler` to `None` to stop sampling.
+        """
+        self.sampler = Sampler(every, **options)
+        return self.sampler
+
+    def scope(self) -> Scope:
+        """Reuse the dependencies resolved by injected calls for the rest of
+        the block, including in tasks created in it and work submitted with
+        `submit` or `run_in_executor`.
+
+        >>>
+        >>> with injector.scope():
+        >>>     handle(request)
+        >>>     await injector.gather(notify(a), notify(b))
+        >>>
+
+        Can also be used with `async with`. See `diana.scope.Scope`.
+        """
+        return Scope(self._scope)
+
+    def create_task(self, coro) -> asyncio.Future:
+        """Run `coro` in a task in the current scope.
+
+        As with any task, it runs in a copy of the current context, so it
+        resolves dependencies in the current scope, if any.
+        """
+        return asyncio.ensure_future(coro)
+
+    async def gather(self, *aws, return_exceptions: bool = False) -> t.List[t.Any]:
+        """`asyncio.gather` the awaitables in the current scope, or if there
+        is none, in a new scope shared between them."""
+        if self._scope.get() is None:
+            with self.scope():
+                futures = [asyncio.ensure_future(aw) for aw in aws]
+        else:
+            futures = [asyncio.ensure_future(aw) for aw in aws]
+        return await asyncio.gather(*futures, return_exceptions=return_exceptions)
+
+    def submit(self, executor, fn, *args, **kwargs):
+        """Submit `fn` to the `concurrent.futures` executor, to be called in
+        a copy of the current context, and so in the current scope."""
+        return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def run_in_executor(self, executor, fn, *args) -> asyncio.Future:
+        """`loop.run_in_executor`, calling `fn` in a copy of the current
+        context, and so in the current scope."""
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(
+            executor, functools.partial(contextvars.copy_context().run, fn, *args)
+        )
+
+    def override(self, overrides: t.Mapping[t.Any, t.Any]) -> "Override":
+        """Override the providers of features for the current thread or
+        task only.
+
+        Each feature is mapped to either a value, or a function marked as
+        a provider, which will be called with the returned `Override` as its
+        module.
+
+        >>>
+        >>> with injector.override({Frob: FakeFrob()}):
+        >>>     my_func()
+        >>>
+
+        The returned context manager can also be used with `async with`.
+        """
+        self._check_frozen()
+        return Override(self, overrides)
+
+    def _get(self, feature, params=None, default=UNSET, bridge=False):
+        """Get the resolved dependency for `feature`.
+
+        With `bridge`, for sync callers only, features with only async
+        providers are resolved through the bridge, if enabled.
+        """
+        overrides = self._overrides.get()
+        if overrides is not None and feature in overrides[0]:
+            module, provider = overrides[0][feature]
+
+        else:
+            values = self.values
+            if feature in values:
+                return values[feature], False
+
+            provider_map = self.providers
+            key = feature
+            if feature not in provider_map:
+                if feature in self.multi_providers:
+                    return self._get_multi(feature, params or _NO_PARAMS)
+                if self._lazy and self._load_lazy(feature):
+                    return self._get(feature, params, default, bridge)
+                key = self._subtype(feature, provider_map, 0)
+                if key is None:
+                    if bridge and self.bridge is not None:
+                        try:
+                            return self._get_bridged(feature, params)
+                        except NoProvider:
+                            pass
+                    if default is UNSET:
+                        raise NoProvider("No provider for {!r}".format(feature))
+                    return default, False
+
+            module, provider = provider_map[key]
+
+            scope = self._scope.get()
+            isctx = getattr(provider, "__contextprovider__", False)
+            if scope is not None and not isctx:
+                return self._get_scoped(scope, feature, module, provider, params), False
 
-        module, provider = provider_map[feature]
         return (
-            provider(module, **params),
+            provider(module, **(params or _NO_PARAMS)),
             getattr(provider, "__contextprovider__", False),
         )
 
+    def _get_scoped(self, scope: Scope, feature, module, provider, params):
+        key = scope_key(feature, params)
+        try:
+            value = scope.get(key)
+        except TypeError:
+            # Dependencies with unhashable params aren't kept in the scope.
+            return provider(module, **(params or _NO_PARAMS))
+        if value is _MISSING:
+            value = scope.set(key, provider(module, **(params or _NO_PARAMS)))
+        return value
+
+    def _get_bridged(self, feature, params):
+        """Get the dependency for `feature` from its async provider, through
+        the bridge."""
+        dep, isctx = self._get_async(feature, params)
+        if isctx:
+            return BridgedContext(dep, self.bridge), True
+        return self.bridge.run(dep), False
+
+    def _bound_values(self):
+        """The values that can be injected without any further lookups."""
+        if self._overrides.get() is not None:
+            return _NO_VALUES
+        return self.values
+
     def get(self, feature, params=None, default=UNSET):
-        dep, _ = self._get(feature, params, default)
+        dep, _ = self._get(feature, params, default, bridge=True)
         return dep
 
-    def _get_async(self, feature, params=None):
-        """Get the resolved async dependency for `feature`."""
+    def _get_async(
+        self, feature, params=None, timeout=None, default=UNSET, fallback=False
+    ):
+        """Get the resolved async dependency for `feature`.
+
+        `timeout`, `default` and `fallback` apply if the provider takes too
+        long, see `_call_async`.
+        """
+        params = params or _NO_PARAMS
+
         provider_map = self.async_providers
+
+        overrides = self._overrides.get()
+        if overrides is not None:
+            if feature in overrides[1]:
+                provider_map = overrides[1]
+            elif feature in overrides[0]:
+                # Let the caller fall back to the sync override.
+                raise NoProvider("No provider for {!r}".format(feature))
+
+        key = feature
         if feature not in provider_map:
-            raise NoProvider("No provider for {!r}".format(feature))
+            if feature in self.multi_providers:
+                return self._get_multi_async(feature, params)
+            if self._lazy and self._load_lazy(feature):
+                return self._get_async(feature, params, timeout, default, fallback)
+            key = self._subtype(feature, provider_map, 1)
+            if key is None:
+                raise NoProvider("No provider for {!r}".format(feature))
 
-        module, provider = provider_map[feature]
-        return (
-            provider(module, **params),
-            getattr(provider, "__contextprovider__", False),
+        module, provider = provider_map[key]
+
+        scope = self._scope.get()
+        if (
+            scope is not None
+            and provider_map is self.async_providers
+            and not provider.__contextprovider__
+        ):
+            key = scope_key(feature, params)
+            try:
+                value = scope.get(key)
+            except TypeError:
+                # Dependencies with unhashable params aren't kept in the scope.
+                pass
+            else:
+                if value is not _MISSING:
+                    return resolved(value), False
+                resolution = scope.resolving(key)
+                if resolution is None:
+                    resolution = scope.resolution(key)
+                    dep, _ = self._call_async(
+                        feature,
+                        module,
+                        provider,
+                        params,
+                        timeout,
+                        default,
+                        fallback,
+                        on_fallback=resolution.discard,
+                    )
+                    resolution.start(dep)
+                return resolution.wait(), False
+
+        return self._call_async(
+            feature, module, provider, params, timeout, default, fallback
         )
 
+    def _subtype(self, feature, provider_map, index: int):
+        """The feature in `provider_map` providing `feature` as a subtype,
+        if enabled. `index` is 0 for sync providers, and 1 for async."""
+        if self._subtypes is None:
+            return None
+        return self._subtypes[index].lookup(feature, provider_map, self.modules)
+
+    def _call_async(
+        self,
+        feature,
+        module,
+        provider,
+        params,
+        timeout=None,
+        default=UNSET,
+        fallback=False,
+        on_fallback=None,
+    ):
+        """Call the async `provider`, bounded by the shorter of `timeout`
+        and the provider's own timeout.
+
+        On timeout, `ProviderTimeout` is raised unless `fallback` (or the
+        provider's `timeout_fallback`) is set, in which case the sync
+        provider for `feature`, or else `default`, is used, and
+        `on_fallback` is called.
+        """
+        dep = provider(module, **params)
+        isctx = getattr(provider, "__contextprovider__", False)
+
+        limit = getattr(provider, "__timeout__", None)
+        if timeout is not None and (limit is None or timeout < limit):
+            limit = timeout
+        if limit is None:
+            return dep, isctx
+
+        fallback = fallback or getattr(provider, "__timeoutfallback__", False)
+        on_timeout = functools.partial(
+            self._timed_out, feature, limit, params, default, fallback, on_fallback
+        )
+        if isctx:
+            return TimedContext(dep, limit, on_timeout), True
+        return timed(dep, limit, on_timeout), False
+
+    def _timed_out(self, feature, timeout, params, default, fallback, on_fallback):
+        self.timeout_counts[feature] += 1
+        if fallback:
+            # Resolved outside any scope, so it doesn't keep the fallback in
+            # place of the async provider's result.
+            token = self._scope.set(None)
+            try:
+                dep, isctx = self._get(feature, params, default)
+            except NoProvider:
+                pass
+            else:
+                if not isctx:
+                    if on_fallback is not None:
+                        on_fallback()
+                    return dep
+            finally:
+                self._scope.reset(token)
+        raise ProviderTimeout(feature, timeout)
+
+    def _get_multi(self, feature, params):
+        """Get the resolved contributions to the multi-binding `feature`.
+
+        Within a scope, the contributions are kept in it, unless any of them
+        are contexts.
+        """
+        contributions = self.multi_providers[feature]
+        if any(provider.__asyncproider__ for _, provider in contributions):
+            raise NoProvider(
+                "Multi-binding {!r} has async providers, and can only be "
+                "injected into async functions".format(feature)
+            )
+
+        scope, key = self._multi_scope(feature, params, contributions)
+        if scope is not None:
+            value = scope.get(key)
+            if value is not _MISSING:
+                return value, False
+
+        deps = [
+            (provider(module, **params), provider.__contextprovider__)
+            for module, provider in contributions
+        ]
+        if any(isctx for _, isctx in deps):
+            return _enter_all(deps), True
+
+        value = [dep for dep, _ in deps]
+        if scope is not None:
+            value = scope.set(key, value)
+        return value, False
+
+    def _get_multi_async(self, feature, params):
+        """Get the resolved contributions to the multi-binding `feature`,
+        awaiting and entering async contributions concurrently."""
+        contributions = self.multi_providers[feature]
+        scope, key = self._multi_scope(feature, params, contributions)
+        if scope is not None:
+            value = scope.get(key)
+            if value is not _MISSING:
+                return resolved(value), False
+            resolution = scope.resolving(key)
+            if resolution is not None:
+                return resolution.wait(), False
+
+        deps = [
+            (
+                provider(module, **params),
+                provider.__contextprovider__,
+                provider.__asyncproider__,
+            )
+            for module, provider in contributions
+        ]
+        if any(isctx for _, isctx, _ in deps):
+            return _aenter_all(deps), True
+        if scope is not None:
+            resolution = scope.resolution(key)
+            resolution.start(_resolve_all(deps))
+            return resolution.wait(), False
+        return _resolve_all(deps), False
+
+    def _multi_scope(self, feature, params, contributions):
+        """The scope to keep the contributions to `feature` in, and their
+        key, or `(None, None)`."""
+        scope = self._scope.get()
+        if scope is None or any(
+            provider.__contextprovider__ for _, provider in contributions
+        ):
+            return None, None
+        key = scope_key(feature, params)
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable params.
+            return None, None
+        return scope, key
+
     def get_async(self, feature, params=None):
         dep, _ = self._get_async(feature, params)
         return dep
 
 
+@contextlib.contextmanager
+def _enter_all(deps):
+    with contextlib.ExitStack() as stack:
+        yield [stack.enter_context(dep) if isctx else dep for dep, isctx in deps]
+
+
+async def _resolve_all(deps, stack=None):
+    """Resolve the (dependency, isctx, is_async) triples in `deps`
+    concurrently, entering any contexts on `stack`."""
+    output = [None] * len(deps)
+    futures, contexts = {}, {}
+
+    for i, (dep, isctx, is_async) in enumerate(deps):
+        if is_async and isctx:
+            contexts[i] = dep
+        elif is_async:
+            futures[i] = dep
+        elif isctx:
+            output[i] = stack.enter_context(dep)
+        else:
+            output[i] = dep
+
+    aws = list(futures.values())
+    if contexts:
+        aws.append(stack.enter_async_context(AsyncContextGroup(contexts.values())))
+
+    results = await gather(*aws)
+    if contexts:
+        results[-1:] = results[-1]
+
+    for i, result in zip(list(futures) + list(contexts), results):
+        output[i] = result
+
+    return output
+
+
+@contextlib.asynccontextmanager
+async def _aenter_all(deps):
+    async with contextlib.AsyncExitStack() as stack:
+        yield await _resolve_all(deps, stack)
+
+
+class InjectedFunction(object):
+    """A function with its dependencies injected, see `wrap_dependent`.
+
+    Binds to instances like the callable it wraps, so can be used for
+    methods, including under `classmethod` and `staticmethod`. Wrapped
+    callables that don't bind, like `functools.partial` objects before
+    Python 3.14, aren't bound either.
+
+    Pickled by reference, like functions.
+    """
+
+    # Calling looks up `__call__` on the type and binds it, so this calls
+    # the dependencies' `call_injected` without a frame of its own.
+    __call__ = property(operator.attrgetter("__dependencies__.call_injected"))
+
+    def __init__(self, injector: Injector, dependencies: "Dependencies"):
+        functools.update_wrapper(self, dependencies.func)
+        self.__dependencies__ = dependencies
+        # Whether the wrapped callable binds, found on first access.
+        self._binds = None
+
+    def __repr__(self):
+        return "<injected {!r}>".format(self.__dependencies__.func)
+
+    def __reduce__(self):
+        return self.__qualname__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        binds = self._binds
+        if binds is None:
+            func = self.__dependencies__.func
+            get = getattr(func, "__get__", None)
+            binds = self._binds = (
+                get is not None and get(instance, owner) is not func
+            )
+        if not binds:
+            return self
+        return types.MethodType(self, instance)
+
+    def with_params(self, kwarg, **params) -> "InjectedFunction":
+        """See `Dependencies.with_params`."""
+        return self.__dependencies__.with_params(kwarg, **params)
+
+
+class InjectedAttribute(object):
+    """Descriptor resolving a dependency on first access, see
+    `Injector.attribute`."""
+
+    def __init__(self, injector: Injector, feature, params):
+        self.injector = injector
+        self.feature = feature
+        self.params = params
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        if self.feature is None:
+            self.feature = owner.__annotations__[name]
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        dep, isctx = self.injector._get(self.feature, self.params, bridge=True)
+        if isctx:
+            raise TypeError(
+                "Attribute {!r} can not be provided by a context provider".format(
+                    self.name
+                )
+            )
+        # As this isn't a data descriptor, the instance attribute is used
+        # from now on.
+        instance.__dict__[self.name] = dep
+        return dep
+
+
+class Override(object):
+    """Context manager applying provider overrides to the current context.
+
+    Overrides are stored in a `contextvars.ContextVar`, so they are only
+    visible to the thread or task that applied them (and to tasks it
+    creates while they are applied). Nested overrides are merged, and the
+    same override can be applied by several threads or tasks at once.
+
+    Provider functions are called with the `Override` as their module.
+    """
+
+    def __init__(self, injector: Injector, overrides: t.Mapping[t.Any, t.Any]):
+        self.injector = injector
+        self.overrides = overrides
+        # The tokens to reset the overrides with, per context.
+        self._tokens = contextvars.ContextVar("diana_override_tokens", default=())
+
+    def __enter__(self) -> "Override":
+        current = self.injector._overrides.get()
+        if current is None:
+            sync_map, async_map = {}, {}
+        else:
+            sync_map, async_map = dict(current[0]), dict(current[1])
+
+        for feature, value in self.overrides.items():
+            if not hasattr(value, "__provides__"):
+                value = singleton(feature, value)
+
+            if value.__asyncproider__:
+                async_map[feature] = (self, value)
+            else:
+                sync_map[feature] = (self, value)
+                async_map.pop(feature, None)
+
+        token = self.injector._overrides.set((sync_map, async_map))
+        self._tokens.set(self._tokens.get() + (token,))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        tokens = self._tokens.get()
+        self._tokens.set(tokens[:-1])
+        self.injector._overrides.reset(tokens[-1])
+
+    async def __aenter__(self) -> "Override":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.__exit__(*exc_info)
+
+
+def _ordered(waits):
+    """Order the keys of `waits` so each one comes after those it waits for."""
+    ordered = []
+    visiting = set()
+
+    def visit(item):
+        if item in ordered:
+            return
+        if item in visiting:
+            raise RuntimeError("Circular module requirement on {!r}".format(item))
+        visiting.add(item)
+        for other in waits[item]:
+            visit(other)
+        visiting.discard(item)
+        ordered.append(item)
+
+    for item in waits:
+        visit(item)
+
+    return ordered
+
+
 def _parameter_injectable(parameter: inspect.Parameter):
     return parameter.kind == inspect.Parameter.KEYWORD_ONLY
 
@@ -213,13 +1190,30 @@ class Dependencies(object):
         self.injector = injector
         self.func = func
 
-        self.signature = inspect.signature(func)
+        # The function's analysis from an activated manifest, if any; the
+        # signature is then only inspected if it's needed.
+        self._precomputed = precomputed("functions", func)
+        self._signature = None
 
         self.dependency_params = {}
         self.dependencies = {}
-        self.defaults = {
-            kwarg: param.default for kwarg, param in self.signature.parameters.items()
-        }
+        self.timeouts = {}
+        if self._precomputed is not None:
+            self.defaults = precomputed_defaults(func, self._precomputed)
+        else:
+            self.defaults = {
+                kwarg: param.default
+                for kwarg, param in self.signature.parameters.items()
+            }
+
+        # Variants created with `with_params`, by (kwarg, params).
+        self._variants = {}
+
+    @property
+    def signature(self) -> inspect.Signature:
+        if self._signature is None:
+            self._signature = inspect.signature(self.func)
+        return self._signature
 
     def __repr__(self):
         params = ", ".join(["{}={!r}".format(k, v) for k, v in self.dependency_params])
@@ -231,11 +1225,78 @@ class Dependencies(object):
         if kwarg in self.dependencies:
             raise RuntimeError("Dependency for kwarg {!r} exists".format(kwarg))
         self.dependencies[kwarg] = feature
+        self._changed()
 
     def add_params(self, kwarg, params):
         self.dependency_params.setdefault(kwarg, {}).update(params)
+        self._changed()
+
+    def add_timeout(self, kwarg, seconds: float, fallback: bool = False):
+        self.timeouts[kwarg] = (seconds, fallback)
+        self._changed()
+
+    def copy(self, injector: Injector) -> "Dependencies":
+        """A copy of these dependencies for `injector`, that can be changed
+        independently."""
+        copied = type(self)(injector, self.func)
+        copied.dependencies = dict(self.dependencies)
+        copied.timeouts = dict(self.timeouts)
+        copied.dependency_params = {
+            kwarg: dict(params) for kwarg, params in self.dependency_params.items()
+        }
+        copied._changed()
+        return copied
+
+    def with_params(self, kwarg, **params) -> FuncType:
+        """A variant of the injected function that also passes `params` to
+        the provider of `kwarg`.
+
+        >>>
+        >>> @injector
+        >>> def query(*, db: Database):
+        >>>     ...
+        >>>
+        >>> tenant_query = query.with_params('db', tenant='acme')
+        >>>
+
+        Variants share the inspected signature and dependencies, and are
+        cached by `kwarg` and `params`, so are cheap to create per call.
+        Variants with unhashable params are created anew each time.
+        """
+        key = (kwarg, tuple(sorted(params.items())))
+        try:
+            return self._variants[key]
+        except KeyError:
+            pass
+        except TypeError:
+            key = None
+
+        variant = copy.copy(self)
+        # Drop any specialization bound to this instance.
+        variant.__dict__.pop("call_injected", None)
+        variant.__dict__.pop("resolve_dependencies", None)
+        variant._variants = {}
+        variant.dependencies = dict(self.dependencies)
+        variant.timeouts = dict(self.timeouts)
+        variant.dependency_params = dict(self.dependency_params)
+        variant.dependency_params[kwarg] = dict(
+            self.dependency_params.get(kwarg, {}), **params
+        )
+
+        wrapped = self.injector._wrap(variant)
+        variant._changed()
+        if key is None:
+            return wrapped
+        return self._variants.setdefault(key, wrapped)
 
     def inspect_dependencies(self):
+        if self._precomputed is not None:
+            dependencies = precomputed_dependencies(self.func, self._precomputed)
+            if dependencies is not None:
+                self.dependencies.update(dependencies)
+                self._changed()
+                return
+
         for kwarg, parameter in self.signature.parameters.items():
             if (
                 not _parameter_injectable(parameter)
@@ -244,18 +1305,143 @@ class Dependencies(object):
                 continue
 
             self.dependencies[kwarg] = parameter.annotation
+        self._changed()
+
+    def _changed(self) -> None:
+        if self.injector.frozen:
+            self.specialize()
+
+    def _plan(self, resolve_async=False):
+        """Look up where each dependency comes from, for a frozen injector.
+
+        Returns a list of `(kwarg, feature, value, module, provider, params,
+        isctx, is_async)` steps, where `provider` is `None` if `value` can be
+        injected as it is. Returns `None` if any dependency can only be
+        resolved by a full lookup.
+        """
+        injector = self.injector
+        plan = []
+
+        for kwarg, feature in self.dependencies.items():
+            params = self.dependency_params.get(kwarg, {})
+
+            if resolve_async and feature in injector.async_providers:
+                module, provider = injector.async_providers[feature]
+                is_async = True
+            elif feature in injector.values:
+                plan.append((kwarg, feature, injector.values[feature]) + (None,) * 5)
+                continue
+            elif (
+                resolve_async
+                and injector._subtype(feature, injector.async_providers, 1)
+                is not None
+            ):
+                key = injector._subtype(feature, injector.async_providers, 1)
+                module, provider = injector.async_providers[key]
+                is_async = True
+            elif feature in injector.providers:
+                module, provider = injector.providers[feature]
+                is_async = False
+            elif feature in injector.multi_providers:
+                # Contributions are only resolved by a full lookup.
+                return None
+            elif injector._subtype(feature, injector.providers, 0) is not None:
+                key = injector._subtype(feature, injector.providers, 0)
+                module, provider = injector.providers[key]
+                is_async = False
+            elif (
+                not resolve_async
+                and injector.bridge is not None
+                and (
+                    feature in injector.async_providers
+                    or injector._subtype(feature, injector.async_providers, 1)
+                    is not None
+                )
+            ):
+                # Async providers are only bridged by a full lookup.
+                return None
+            elif self.defaults.get(kwarg, UNSET) is not UNSET:
+                plan.append((kwarg, feature, self.defaults[kwarg]) + (None,) * 5)
+                continue
+            else:
+                return None
+
+            isctx = getattr(provider, "__contextprovider__", False)
+            plan.append(
+                (kwarg, feature, None, module, provider, params, isctx, is_async)
+            )
+
+        return plan
+
+    def specialize(self) -> bool:
+        """Bind the dependencies directly to their providers, for a frozen
+        injector. Returns whether the function could be specialized."""
+        self.__dict__.pop("call_injected", None)
+        self.__dict__.pop("resolve_dependencies", None)
+
+        self._frozen_plan = self._plan()
+        if self._frozen_plan is None:
+            return False
+
+        if any(step[6] for step in self._frozen_plan):
+            self.resolve_dependencies = self._resolve_planned
+        else:
+            # Without any contexts, no exit stack is needed either.
+            self.call_injected = self._call_planned
+        return True
+
+    def _resolve_planned(self, called_kwargs, stack):
+        if self.injector._scope.get() is not None:
+            return Dependencies.resolve_dependencies(self, called_kwargs, stack)
+
+        output = {}
+        for kwarg, _, value, module, provider, params, isctx, _ in self._frozen_plan:
+            if kwarg in called_kwargs:
+                continue
+            if provider is None:
+                output[kwarg] = value
+            elif isctx:
+                output[kwarg] = stack.enter_context(provider(module, **params))
+            else:
+                output[kwarg] = provider(module, **params)
+        return output
+
+    def _call_planned(self, *args, **kwargs) -> t.Any:
+        injector = self.injector
+        sampler = injector.sampler
+        if sampler is not None and sampler.should_sample():
+            return self.call_sampled(sampler, *args, **kwargs)
+        if injector._scope.get() is not None:
+            with contextlib.ExitStack() as stack:
+                kwargs.update(self.resolve_dependencies(kwargs, stack))
+                return self.func(*args, **kwargs)
+
+        for kwarg, _, value, module, provider, params, _, _ in self._frozen_plan:
+            if kwarg in kwargs:
+                continue
+            if provider is None:
+                kwargs[kwarg] = value
+            else:
+                kwargs[kwarg] = provider(module, **params)
+        return self.func(*args, **kwargs)
 
     def resolve_dependencies(self, called_kwargs, stack):
         output = {}
+        values = self.injector._bound_values()
 
         for kwarg, feature in self.dependencies.items():
             if kwarg in called_kwargs:
                 # Dependency already provided explicitly
                 continue
-            params = self.dependency_params.get(kwarg, {})
+            if feature in values:
+                output[kwarg] = values[feature]
+                continue
+            params = self.dependency_params.get(kwarg, _NO_PARAMS)
             default = self.defaults.get(kwarg, UNSET)
 
-            dep, isctx = self.injector._get(feature, params=params, default=default)
+            dep, isctx = self.injector._get(
+                feature, params=params, default=default, bridge=True
+            )
 
             if isctx:
                 dep = stack.enter_context(dep)
@@ -265,10 +1451,35 @@ class Dependencies(object):
         return output
 
     def call_injected(self, *args, **kwargs) -> t.Any:
+        """Call the function with its dependencies injected, sampling the
+        overhead if the injector is sampling."""
+        sampler = self.injector.sampler
+        if sampler is not None and sampler.should_sample():
+            return self.call_sampled(sampler, *args, **kwargs)
         with contextlib.ExitStack() as stack:
             kwargs.update(self.resolve_dependencies(kwargs, stack))
             return self.func(*args, **kwargs)
 
+    def call_sampled(self, sampler: Sampler, *args, **kwargs) -> t.Any:
+        """`call_injected`, recording the time taken in `sampler`."""
+        start = time.perf_counter()
+        called = returned = None
+        try:
+            with contextlib.ExitStack() as stack:
+                kwargs.update(self.resolve_dependencies(kwargs, stack))
+                called = time.perf_counter()
+                try:
+                    return self.func(*args, **kwargs)
+                finally:
+                    returned = time.perf_counter()
+        finally:
+            if returned is not None:
+                self._sampled(sampler, start, called, returned)
+
+    def _sampled(self, sampler, start, called, returned) -> None:
+        overhead = called - start + time.perf_counter() - returned
+        sampler.record(feature_id(self.func), overhead, returned - called)
+
 
 class AsyncDependencies(Dependencies):
     """Container class to manage dependencies for an injected async function.
@@ -276,39 +1487,135 @@ class AsyncDependencies(Dependencies):
 
     async def resolve_dependencies(self, called_kwargs, stack):
         output = {}
-        futures = {}
+        pending = {}
+        values = self.injector._bound_values()
+        async_providers = self.injector.async_providers
+        deadline = remaining()
 
         for kwarg, feature in self.dependencies.items():
             if kwarg in called_kwargs:
                 continue
+            if feature in values and feature not in async_providers:
+                output[kwarg] = values[feature]
+                continue
 
-            params = self.dependency_params.get(kwarg, {})
+            params = self.dependency_params.get(kwarg, _NO_PARAMS)
+            default = self.defaults.get(kwarg, UNSET)
+            timeout, fallback = self._timeout(kwarg, deadline)
             try:
-                dep, isctx = self.injector._get_async(feature, params)
-                if isctx:
-                    dep = stack.enter_async_context(dep)
-                futures[kwarg] = dep
+                pending[kwarg] = self.injector._get_async(
+                    feature, params, timeout, default, fallback
+                )
 
             except NoProvider:
-                dep, isctx = self.injector._get(
-                    feature, params=params, default=self.defaults.get(kwarg, UNSET)
-                )
+                dep, isctx = self.injector._get(feature, params=params, default=default)
                 if isctx:
                     dep = stack.enter_context(dep)
                 output[kwarg] = dep
 
-        for k, v in futures.items():
-            output[k] = await v
+        return await self._await_pending(output, pending, stack)
+
+    def specialize(self) -> bool:
+        self.__dict__.pop("resolve_dependencies", None)
+
+        self._frozen_plan = self._plan(resolve_async=True)
+        if self._frozen_plan is None:
+            return False
+
+        self.resolve_dependencies = self._resolve_planned
+        return True
+
+    def _timeout(self, kwarg, deadline):
+        """The timeout and fallback for resolving `kwarg` by `deadline`."""
+        timeout, fallback = self.timeouts.get(kwarg, _NO_TIMEOUT)
+        if deadline is not None and (timeout is None or deadline < timeout):
+            timeout = deadline
+        return timeout, fallback
+
+    async def _resolve_planned(self, called_kwargs, stack):
+        if self.injector._scope.get() is not None:
+            return await AsyncDependencies.resolve_dependencies(
+                self, called_kwargs, stack
+            )
+
+        output = {}
+        pending = {}
+        deadline = remaining()
+
+        for step in self._frozen_plan:
+            kwarg, feature, value, module, provider, params, isctx, is_async = step
+            if kwarg in called_kwargs:
+                continue
+            if provider is None:
+                output[kwarg] = value
+            elif is_async:
+                timeout, fallback = self._timeout(kwarg, deadline)
+                pending[kwarg] = self.injector._call_async(
+                    feature,
+                    module,
+                    provider,
+                    params,
+                    timeout,
+                    self.defaults.get(kwarg, UNSET),
+                    fallback,
+                )
+            elif isctx:
+                output[kwarg] = stack.enter_context(provider(module, **params))
+            else:
+                output[kwarg] = provider(module, **params)
+
+        return await self._await_pending(output, pending, stack)
+
+    async def _await_pending(self, output, pending, stack):
+        if self.injector.concurrent:
+            await self._resolve_concurrently(output, pending, stack)
+            return output
+
+        for kwarg, (dep, isctx) in pending.items():
+            if isctx:
+                dep = stack.enter_async_context(dep)
+            output[kwarg] = await dep
 
         return output
 
+    async def _resolve_concurrently(self, output, pending, stack):
+        """Await all pending dependencies at once, entering the async
+        context dependencies as a single group on `stack` so they are
+        also exited together."""
+        deps = [(dep, isctx, True) for dep, isctx in pending.values()]
+        output.update(zip(pending, await _resolve_all(deps, stack)))
+
     def call_injected(self, *args, **kwargs) -> t.Any:
+        sampler = self.injector.sampler
+        if sampler is not None and sampler.should_sample():
+            return self.call_sampled(sampler, *args, **kwargs)
         if not asyncio.iscoroutinefunction(self.func):
             # We can assume that a non-coroutinefunction is actually a generator
             return self._yield_injected(*args, **kwargs)
         else:
             return self._return_injected(*args, **kwargs)
 
+    def call_sampled(self, sampler: Sampler, *args, **kwargs) -> t.Any:
+        if not asyncio.iscoroutinefunction(self.func):
+            # The time spent in async generators isn't measured.
+            return self._yield_injected(*args, **kwargs)
+        return self._return_sampled(sampler, *args, **kwargs)
+
+    async def _return_sampled(self, sampler: Sampler, *args, **kwargs) -> t.Any:
+        start = time.perf_counter()
+        called = returned = None
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                kwargs.update(await self.resolve_dependencies(kwargs, stack))
+                called = time.perf_counter()
+                try:
+                    return await self.func(*args, **kwargs)
+                finally:
+                    returned = time.perf_counter()
+        finally:
+            if returned is not None:
+                self._sampled(sampler, start, called, returned)
+
     async def _return_injected(self, *args, **kwargs) -> t.Any:
         async with contextlib.AsyncExitStack() as stack:
             kwargs.update(await self.resolve_dependencies(kwargs, stack))
@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import threading
+import typing as t
+import weakref
+
+
+class _Call(object):
+    """A sync provider call that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Limiter(object):
+    """Wraps a provider, limiting how many calls to it can be in flight at
+    once and optionally coalescing concurrent calls with the same params.
+
+    Calls beyond `max_concurrency` wait for a running one to complete, on
+    a `threading.Semaphore` for sync providers and an `asyncio.Semaphore`
+    for async ones. A context provider's slot is held until its context
+    is exited.
+
+    With `coalesce`, a call made while another with the same params is in
+    flight waits for, and shares, its result.
+    """
+
+    def __init__(
+        self,
+        provider: t.Callable[..., t.Any],
+        max_concurrency: t.Optional[int] = None,
+        coalesce: bool = False,
+    ):
+        functools.update_wrapper(self, provider)
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.coalesce = coalesce
+
+        self._semaphore = None
+        if max_concurrency is not None:
+            self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        # asyncio semaphores are bound to the loop they are first used in.
+        self._async_semaphores = weakref.WeakKeyDictionary()
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def __call__(self, module, **params):
+        if self.provider.__asyncproider__:
+            if self.provider.__contextprovider__:
+                return _AsyncLimitedContext(self, self.provider(module, **params))
+            if self.coalesce:
+                return self._call_coalesced_async(module, params)
+            return self._call_async(module, params)
+
+        if self.provider.__contextprovider__:
+            return _LimitedContext(self, self.provider(module, **params))
+        if self.coalesce:
+            return self._call_coalesced(module, params)
+        return self._call(module, params)
+
+    def async_semaphore(self) -> t.Optional[asyncio.Semaphore]:
+        if self.max_concurrency is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        try:
+            return self._async_semaphores[loop]
+        except KeyError:
+            semaphore = asyncio.BoundedSemaphore(self.max_concurrency)
+            return self._async_semaphores.setdefault(loop, semaphore)
+
+    def _call(self, module, params):
+        if self._semaphore is None:
+            return self.provider(module, **params)
+        with self._semaphore:
+            return self.provider(module, **params)
+
+    def _call_coalesced(self, module, params):
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._call(module, params)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    async def _call_async(self, module, params):
+        semaphore = self.async_semaphore()
+        if semaphore is None:
+            return await self.provider(module, **params)
+        async with semaphore:
+            return await self.provider(module, **params)
+
+    async def _call_coalesced_async(self, module, params):
+        # Keyed by loop as well, as futures can't be shared between loops.
+        key = (asyncio.get_running_loop(), tuple(sorted(params.items())))
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._call_async(module, params))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        return await asyncio.shield(future)
+
+
+class _LimitedContext(object):
+    def __init__(self, limiter: Limiter, cm):
+        self.limiter = limiter
+        self.cm = cm
+
+    def __enter__(self):
+        semaphore = self.limiter._semaphore
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            return self.cm.__enter__()
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return self.cm.__exit__(exc_type, exc, tb)
+        finally:
+            if self.limiter._semaphore is not None:
+                self.limiter._semaphore.release()
+
+
+class _AsyncLimitedContext(object):
+    def __init__(self, limiter: Limiter, cm):
+        self.limiter = limiter
+        self.cm = cm
+        self.semaphore = None
+
+    async def __aenter__(self):
+        self.semaphore = self.limiter.async_semaphore()
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+        try:
+            return await self.cm.__aenter__()
+        except BaseException:
+            if self.semaphore is not None:
+                self.semaphore.release()
+            raise
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return await self.cm.__aexit__(exc_type, exc, tb)
+        finally:
+            if self.semaphore is not None:
+                self.semaphore.release()
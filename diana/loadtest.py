@@ -0,0 +1,314 @@
+"""Drive concurrent callers through a synthetic module graph.
+
+    python -m diana.loadtest --features 20 --async-ratio 0.5 --concurrency 100
+
+Reports throughput, call latency percentiles, event loop lag (asyncio mode)
+and the memory allocated per injected call.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tracemalloc
+import contextlib
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from .injector import Injector
+from .module import Module, provides
+
+
+ASYNCIO = "asyncio"
+THREADS = "threads"
+
+
+class Graph(object):
+    """An injector loaded with a synthetic module, and functions injected
+    with every feature it can resolve."""
+
+    def __init__(self, injector, features, sync_caller, async_caller):
+        self.injector = injector
+        self.features = features
+        self.sync_caller = sync_caller
+        self.async_caller = async_caller
+
+
+def _make_provider(index, isasync, iscontext, latency):
+    value = "feature-{}".format(index)
+
+    if isasync and iscontext:
+
+        @contextlib.asynccontextmanager
+        async def provide(self):
+            if latency:
+                await asyncio.sleep(latency)
+            yield value
+
+    elif isasync:
+
+        async def provide(self):
+            if latency:
+                await asyncio.sleep(latency)
+            return value
+
+    elif iscontext:
+
+        @contextlib.contextmanager
+        def provide(self):
+            if latency:
+                time.sleep(latency)
+            yield value
+
+    else:
+
+        def provide(self):
+            if latency:
+                time.sleep(latency)
+            return value
+
+    return provide
+
+
+def build(
+    features: int = 10,
+    async_ratio: float = 0.5,
+    context_ratio: float = 0.2,
+    latency: float = 0.0,
+    concurrent: bool = False,
+    seed: int = 0,
+) -> Graph:
+    """Build an injector providing `features` features, with `async_ratio`
+    of them provided asynchronously and `context_ratio` of them by context
+    providers. Each provider waits `latency` seconds."""
+    rng = random.Random(seed)
+    attrs = {}
+    sync_features = []
+    all_features = []
+
+    for i in range(features):
+        feature = t.NewType("Feature{}".format(i), str)
+        isasync = rng.random() < async_ratio
+        iscontext = rng.random() < context_ratio
+        provide = _make_provider(i, isasync, iscontext, latency)
+        attrs["provide_{}".format(i)] = provides(feature, context=iscontext)(provide)
+
+        all_features.append(feature)
+        if not isasync:
+            sync_features.append(feature)
+
+    module = type("LoadTestModule", (Module,), attrs)
+    injector = Injector(concurrent=concurrent)
+    injector.load(module())
+
+    def sync_caller(**kwargs):
+        return len(kwargs)
+
+    async def async_caller(**kwargs):
+        return len(kwargs)
+
+    sync_caller = injector.inject(
+        **{"f{}".format(i): f for i, f in enumerate(sync_features)}
+    )(sync_caller)
+    async_caller = injector.inject(
+        **{"f{}".format(i): f for i, f in enumerate(all_features)}
+    )(async_caller)
+
+    return Graph(injector, all_features, sync_caller, async_caller)
+
+
+def percentile(ordered: t.Sequence[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _report(mode, concurrency, elapsed, latencies, lags=None, allocated=None):
+    latencies = sorted(latencies)
+    report = {
+        "mode": mode,
+        "concurrency": concurrency,
+        "calls": len(latencies),
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+    }
+    if lags is not None:
+        report["loop_lag"] = {
+            "mean": sum(lags) / len(lags) if lags else 0.0,
+            "max": max(lags, default=0.0),
+        }
+    if allocated is not None:
+        report["allocated_per_call"] = allocated
+    return report
+
+
+async def _monitor_lag(lags, interval):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_async(
+    graph: Graph, concurrency: int, calls: int, lag_interval: float = 0.01
+) -> t.Dict[str, t.Any]:
+    """Make `calls` calls to the async caller, `concurrency` at a time."""
+    latencies = []
+    lags = []
+    remaining = iter(range(calls))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await graph.async_caller()
+            latencies.append(time.perf_counter() - start)
+
+    monitor = asyncio.ensure_future(_monitor_lag(lags, lag_interval))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    monitor.cancel()
+
+    return _report(ASYNCIO, concurrency, elapsed, latencies, lags=lags)
+
+
+def run_threads(graph: Graph, concurrency: int, calls: int) -> t.Dict[str, t.Any]:
+    """Make `calls` calls to the sync caller from `concurrency` threads."""
+
+    def call(_):
+        start = time.perf_counter()
+        graph.sync_caller()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(call, range(calls)))
+        elapsed = time.perf_counter() - start
+
+    return _report(THREADS, concurrency, elapsed, latencies)
+
+
+def _reset_peak() -> None:
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        # Before Python 3.9, only restarting tracing resets the peak.
+        tracemalloc.stop()
+        tracemalloc.start()
+
+
+def measure_allocations(graph: Graph, mode: str, calls: int = 100) -> float:
+    """Mean peak bytes allocated during a single injected call."""
+    if mode == ASYNCIO:
+        loop = asyncio.new_event_loop()
+
+        def call():
+            loop.run_until_complete(graph.async_caller())
+
+    else:
+        loop = None
+        call = graph.sync_caller
+
+    # Warm up any lazily created state before measuring.
+    call()
+
+    total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            _reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            call()
+            total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+        if loop is not None:
+            loop.close()
+
+    return total / calls
+
+
+def format_report(report: t.Dict[str, t.Any]) -> str:
+    lines = [
+        "mode:        {mode} x {concurrency}".format(**report),
+        "calls:       {calls} in {elapsed:.3f}s".format(**report),
+        "throughput:  {throughput:.0f} calls/s".format(**report),
+        (
+            "latency:     p50={p50:.6f}s p90={p90:.6f}s p99={p99:.6f}s "
+            "max={max:.6f}s".format(**report["latency"])
+        ),
+    ]
+    if "loop_lag" in report:
+        lines.append(
+            "loop lag:    mean={mean:.6f}s max={max:.6f}s".format(**report["loop_lag"])
+        )
+    if "allocated_per_call" in report:
+        lines.append(
+            "allocations: {:.0f} bytes/call".format(report["allocated_per_call"])
+        )
+    return "\n".join(lines)
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> t.Dict[str, t.Any]:
+    parser = argparse.ArgumentParser(
+        prog="python -m diana.loadtest", description=__doc__
+    )
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--async-ratio", type=float, default=0.5)
+    parser.add_argument("--context-ratio", type=float, default=0.2)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Provider latency in seconds"
+    )
+    parser.add_argument("--mode", choices=[ASYNCIO, THREADS], default=ASYNCIO)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="Resolve async dependencies concurrently",
+    )
+    parser.add_argument(
+        "--allocations",
+        action="store_true",
+        help="Measure the memory allocated per call",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Output the report as JSON")
+    args = parser.parse_args(argv)
+
+    graph = build(
+        features=args.features,
+        async_ratio=args.async_ratio,
+        context_ratio=args.context_ratio,
+        latency=args.latency,
+        concurrent=args.concurrent,
+        seed=args.seed,
+    )
+
+    if args.mode == ASYNCIO:
+        report = asyncio.run(run_async(graph, args.concurrency, args.calls))
+    else:
+        report = run_threads(graph, args.concurrency, args.calls)
+
+    if args.allocations:
+        report["allocated_per_call"] = measure_allocations(graph, args.mode)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,345 @@
+"""Manifests mapping features to the modules that provide them.
+
+A manifest lets an injector import a module only the first time one of its
+features is needed, see `Injector.register_lazy`. It also records the
+analysis of providers and injected functions, so processes that `activate`
+it can skip inspecting them at start up. Generate one with:
+
+    python -m diana manifest pkg.modules:DatabaseModule pkg.modules:CacheModule \\
+        --scan pkg.views -o manifest.json
+"""
+import sys
+import json
+import hashlib
+import inspect
+import argparse
+import importlib
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .module import Module  # noqa
+
+
+VERSION = 2
+
+# Versions 1 manifests only have the `features` section.
+SUPPORTED_VERSIONS = (1, 2)
+
+_MISSING = object()
+
+# The manifest activated in this process, and whether the source of each
+# module is unchanged since it was built.
+_active = None
+_unchanged = {}
+
+
+def feature_id(feature) -> str:
+    """A stable, importable name for `feature`, e.g. `pkg.types.Config`."""
+    origin = getattr(feature, "__origin__", None)
+    if origin is not None:
+        args = ", ".join(feature_id(arg) for arg in getattr(feature, "__args__", ()))
+        return "{}[{}]".format(feature_id(origin), args)
+
+    if hasattr(feature, "__supertype__") and "<locals>" in getattr(
+        feature, "__qualname__", ""
+    ):
+        # Before Python 3.10, new types are functions defined in `typing`,
+        # without the module that created them, so only have their name.
+        return "typing.NewType[{}]".format(feature.__name__)
+
+    name = getattr(feature, "__qualname__", None) or getattr(feature, "__name__", None)
+    if name is None:
+        return repr(feature)
+    return "{}.{}".format(feature.__module__, name)
+
+
+def object_path(obj) -> str:
+    """The `pkg.module:QualName` path of `obj`."""
+    return "{}:{}".format(obj.__module__, obj.__qualname__)
+
+
+def import_path(path: str) -> t.Any:
+    """Import the object at the `pkg.module:QualName` path."""
+    module_name, _, qualname = path.partition(":")
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split(".") if qualname else ():
+        obj = getattr(obj, attr)
+    return obj
+
+
+def module_features(module: t.Type["Module"]) -> t.List[t.Any]:
+    """Every feature that instances of `module` provide when loaded."""
+    features = []
+    features.extend(module.providers)
+    features.extend(module.async_providers)
+    features.extend(t.Sequence[f] for f in module.multi_providers)
+    features.extend(module.values)
+    return features
+
+
+def module_providers(module: t.Type["Module"]) -> t.List[t.Callable[..., t.Any]]:
+    """Every provider of `module`."""
+    providers = []
+    providers.extend(module.providers.values())
+    providers.extend(module.async_providers.values())
+    for contributions in module.multi_providers.values():
+        providers.extend(contributions)
+    return providers
+
+
+def source_checksum(module_name: str) -> t.Optional[str]:
+    """The SHA-256 of the source file of the imported module, if it has
+    one."""
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    if not path:
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _importable(obj) -> bool:
+    qualname = getattr(obj, "__qualname__", None)
+    return (
+        qualname is not None
+        and getattr(obj, "__module__", None) is not None
+        and "<locals>" not in qualname
+    )
+
+
+def _provider_entry(func) -> t.Optional[t.Dict[str, t.Any]]:
+    if not _importable(func):
+        return None
+    annotation = inspect.signature(func).return_annotation
+    if annotation is not getattr(func, "__annotations__", {}).get("return", _MISSING):
+        return None
+    return {"feature": feature_id(annotation)}
+
+
+def _function_entry(func) -> t.Optional[t.Dict[str, t.Any]]:
+    # Wrapped functions don't have the defaults of the functions they wrap.
+    if (
+        not inspect.isfunction(func)
+        or hasattr(func, "__wrapped__")
+        or not _importable(func)
+    ):
+        return None
+
+    positional, keyword, inject = [], [], {}
+    for name, parameter in inspect.signature(func).parameters.items():
+        if parameter.kind == inspect.Parameter.KEYWORD_ONLY:
+            keyword.append(name)
+            if parameter.annotation is not inspect.Parameter.empty:
+                inject[name] = feature_id(parameter.annotation)
+        elif parameter.kind in (
+            inspect.Parameter.POSITIONAL_ONLY,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        ):
+            positional.append(name)
+
+    return {"positional": positional, "keyword": keyword, "inject": inject}
+
+
+def build_manifest(
+    *modules: t.Type["Module"], functions: t.Iterable[t.Any] = ()
+) -> t.Dict[str, t.Any]:
+    """Build a manifest of the features provided by `modules`, and the
+    analysis of their providers and the injected `functions`.
+
+    As when loading modules, later modules take precedence for features
+    provided by more than one of them. Raises `ValueError` if different
+    features have the same id, e.g. new types with the same name before
+    Python 3.10.
+    """
+    features = {}
+    providers = {}
+    sources = set()
+    seen = {}
+    for module in modules:
+        path = object_path(module)
+        for feature in module_features(module):
+            key = feature_id(feature)
+            other = seen.setdefault(key, feature)
+            if other != feature:
+                raise ValueError(
+                    "Feature {!r} provided by {} has the same id {!r} as "
+                    "{!r}".format(feature, path, key, other)
+                )
+            features[key] = path
+
+        for func in module_providers(module):
+            entry = _provider_entry(func)
+            if entry is not None:
+                providers[object_path(func)] = entry
+                sources.add(func.__module__)
+
+    analysed = {}
+    for func in functions:
+        dependencies = getattr(func, "__dependencies__", None)
+        if dependencies is not None:
+            func = dependencies.func
+        entry = _function_entry(func)
+        if entry is not None:
+            analysed[object_path(func)] = entry
+            sources.add(func.__module__)
+
+    checksums = {}
+    for name in sorted(sources):
+        checksum = source_checksum(name)
+        if checksum is not None:
+            checksums[name] = checksum
+
+    return {
+        "version": VERSION,
+        "features": features,
+        "providers": providers,
+        "functions": analysed,
+        "checksums": checksums,
+    }
+
+
+def scan(module_name: str) -> t.List[t.Any]:
+    """The injected functions, classes and methods defined at the top level
+    of the module."""
+    module = importlib.import_module(module_name)
+    found = []
+    for obj in list(vars(module).values()):
+        if getattr(obj, "__module__", None) != module_name:
+            continue
+        if hasattr(obj, "__dependencies__"):
+            found.append(obj)
+        if inspect.isclass(obj):
+            found.extend(
+                attr for attr in vars(obj).values() if hasattr(attr, "__dependencies__")
+            )
+    return found
+
+
+def activate(manifest: t.Union[str, t.Mapping[str, t.Any]]) -> None:
+    """Use the analysis in `manifest` (or the manifest file at that path)
+    in place of inspecting the providers and injected functions it covers.
+
+    Must be called before the modules defining them are imported. Anything
+    defined in a module whose source has changed since the manifest was
+    built is inspected as usual.
+    """
+    global _active
+    if isinstance(manifest, str):
+        manifest = read_manifest(manifest)
+    _active = manifest
+    _unchanged.clear()
+
+
+def deactivate() -> None:
+    global _active
+    _active = None
+    _unchanged.clear()
+
+
+def _is_unchanged(module_name: str) -> bool:
+    try:
+        return _unchanged[module_name]
+    except KeyError:
+        pass
+
+    expected = _active.get("checksums", {}).get(module_name)
+    unchanged = expected is not None and source_checksum(module_name) == expected
+    _unchanged[module_name] = unchanged
+    return unchanged
+
+
+def precomputed(section: str, obj) -> t.Optional[t.Dict[str, t.Any]]:
+    """The active manifest's entry for `obj` in `section`, if its module is
+    unchanged."""
+    active = _active
+    if active is None or not _importable(obj):
+        return None
+    entry = active.get(section, {}).get(object_path(obj))
+    if entry is None or not _is_unchanged(obj.__module__):
+        return None
+    return entry
+
+
+def return_annotation(func) -> t.Any:
+    """The return annotation of `func`, from the active manifest if it
+    covers `func`."""
+    entry = precomputed("providers", func)
+    if entry is not None:
+        annotation = getattr(func, "__annotations__", {}).get("return", _MISSING)
+        if annotation is not _MISSING and feature_id(annotation) == entry["feature"]:
+            return annotation
+    return inspect.signature(func).return_annotation
+
+
+def precomputed_defaults(func, entry) -> t.Dict[str, t.Any]:
+    """The default of each argument of `func`, or `inspect.Parameter.empty`,
+    given its manifest `entry`."""
+    defaults = dict.fromkeys(entry["positional"], inspect.Parameter.empty)
+    positional_defaults = func.__defaults__ or ()
+    if positional_defaults:
+        defaults.update(
+            zip(entry["positional"][-len(positional_defaults):], positional_defaults)
+        )
+    for kwarg in entry["keyword"]:
+        defaults[kwarg] = (func.__kwdefaults__ or {}).get(
+            kwarg, inspect.Parameter.empty
+        )
+    return defaults
+
+
+def precomputed_dependencies(func, entry) -> t.Optional[t.Dict[str, t.Any]]:
+    """The dependencies `Dependencies.inspect_dependencies` would find for
+    `func`, given its manifest `entry`, or `None` if they don't match."""
+    annotations = getattr(func, "__annotations__", {})
+    dependencies = {}
+    for kwarg, expected in entry["inject"].items():
+        annotation = annotations.get(kwarg, _MISSING)
+        if annotation is _MISSING or feature_id(annotation) != expected:
+            return None
+        dependencies[kwarg] = annotation
+    return dependencies
+
+
+def read_manifest(path: str) -> t.Dict[str, t.Any]:
+    with open(path) as f:
+        manifest = json.load(f)
+
+    if manifest.get("version") not in SUPPORTED_VERSIONS:
+        raise ValueError(
+            "Unsupported manifest version {!r} in {}".format(
+                manifest.get("version"), path
+            )
+        )
+    return manifest
+
+
+def write_manifest(manifest: t.Dict[str, t.Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m diana manifest", description=__doc__
+    )
+    parser.add_argument("modules", nargs="+", help="pkg.module:ModuleClass paths")
+    parser.add_argument(
+        "--scan",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help="Analyse the injected functions defined in MODULE",
+    )
+    parser.add_argument("-o", "--output", help="Defaults to standard output")
+    args = parser.parse_args(argv)
+
+    functions = [func for name in args.scan for func in scan(name)]
+    manifest = build_manifest(
+        *(import_path(path) for path in args.modules), functions=functions
+    )
+
+    if args.output:
+        write_manifest(manifest, args.output)
+    else:
+        json.dump(manifest, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
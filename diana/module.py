@@ -1,8 +1,10 @@
-import inspect
 import asyncio
+import functools
 import typing as t
 
 from .util import isasync
+from .shared import SharedResource
+from .manifest import return_annotation
 
 
 Feature = t.TypeVar("Feature")
@@ -21,52 +23,168 @@ if t.TYPE_CHECKING:
 
 
 def mark_provides(
-    func: FeatureProvider, feature: Feature, context: bool = False
+    func: FeatureProvider,
+    feature: Feature,
+    context: bool = False,
+    multi: bool = False,
+    timeout: t.Optional[float] = None,
+    timeout_fallback: bool = False,
+    max_concurrency: t.Optional[int] = None,
+    coalesce: bool = False,
+    deferred_exit: bool = False,
 ) -> None:
+    """Mark `func` as a provider of `feature`.
+
+    If `context` is set, `func` returns a context manager that is entered
+    for the duration of the injected call.
+
+    If `multi` is set, `func` contributes to the multi-binding of `feature`
+    instead. The contributions of every loaded module are injected together
+    for `typing.Sequence[feature]`.
+
+    If `timeout` is set, an async provider (or entering its context) that
+    takes longer raises `diana.ProviderTimeout`. With `timeout_fallback`,
+    the feature is resolved as if there were no async provider instead:
+    from a sync provider, or the injected parameter's default.
+
+    If `max_concurrency` is set, the injector allows at most that many calls
+    to the provider (or contexts entered from it) at once. If `coalesce` is
+    set, concurrent calls with the same params share a single call.
+
+    If `deferred_exit` is set, a context provider's context is exited in the
+    background once the injected call has returned, rather than before it
+    returns, see `diana.teardown.Teardown`.
+    """
+    if coalesce and context:
+        raise ValueError("Calls to context providers can not be coalesced")
+    if deferred_exit and not context:
+        raise ValueError("Only the exit of context providers can be deferred")
+
     func.__provides__ = feature
     func.__contextprovider__ = context
+    func.__multiprovider__ = multi
+    func.__timeout__ = timeout
+    func.__timeoutfallback__ = timeout_fallback
+    func.__maxconcurrency__ = max_concurrency
+    func.__coalesce__ = coalesce
+    func.__deferredexit__ = deferred_exit
     func.__asyncproider__ = isasync(func)
 
 
-def provider(func: FeatureProvider, context: bool = False) -> FeatureProvider:
-    signature = inspect.signature(func)
-    mark_provides(func, signature.return_annotation, context)
+def provider(
+    func: t.Optional[FeatureProvider] = None, context: bool = False, **options
+) -> FeatureProvider:
+    """Mark `func` as the provider of the feature in its return annotation.
+
+    Can be used with options, e.g. `@provider(multi=True)`, see
+    `mark_provides`.
+    """
+    if func is None:
+        return functools.partial(provider, context=context, **options)
+
+    mark_provides(func, return_annotation(func), context, **options)
     return func
 
 
-def contextprovider(func: FeatureProvider) -> FeatureProvider:
-    signature = inspect.signature(func)
-    mark_provides(func, signature.return_annotation, True)
+def contextprovider(
+    func: t.Optional[FeatureProvider] = None, **options
+) -> FeatureProvider:
+    if func is None:
+        return functools.partial(contextprovider, **options)
+
+    mark_provides(func, return_annotation(func), True, **options)
     return func
 
 
-def provides(feature: Feature, context=False):
+def sharedprovider(
+    func: t.Optional[SyncFeatureProvider] = None,
+    name: t.Optional[str] = None,
+    version: t.Any = None,
+    directory: t.Optional[str] = None,
+) -> SyncFeatureProvider:
+    """Mark `func` as the provider of a read-only resource shared between
+    processes.
+
+    `func` returns the resource's data as a bytes-like object. It is only
+    called if no process has materialized the resource yet, and the feature
+    is injected as a read-only `memoryview` of a memory mapped copy of it,
+    see `diana.shared.SharedResource`.
+
+    >>>
+    >>> class GeoModule(diana.Module):
+    >>>     @diana.sharedprovider(version=3)
+    >>>     def provide_index(self) -> GeoIndex:
+    >>>         return build_index().tobytes()
+    >>>
+
+    The mapping is released when the module is unloaded. The resource is
+    available as the provider's `__shared__` attribute.
+    """
+    if func is None:
+        return functools.partial(
+            sharedprovider, name=name, version=version, directory=directory
+        )
+    if isasync(func):
+        raise TypeError("Shared resources must be built by a sync function")
+
+    resource = SharedResource(func, name, version, directory)
+
+    @functools.wraps(func)
+    def provide(module):
+        return resource.get(module)
+
+    provide.__shared__ = resource
+    provide.__release__ = resource.release
+    mark_provides(provide, return_annotation(func))
+    return provide
+
+
+def provides(feature: Feature, context=False, **options):
     def _decorator(func: FeatureProvider) -> FeatureProvider:
-        mark_provides(func, feature, context)
+        mark_provides(func, feature, context, **options)
         return func
 
     return _decorator
 
 
+def singleton(feature: Feature, value: t.Any) -> SyncFeatureProvider:
+    """Create a provider that always provides `value` for `feature`."""
+
+    def provide(module):
+        return value
+
+    mark_provides(provide, feature)
+    return provide
+
+
 class ModuleMeta(type):
     def __new__(mcls, name, bases, attrs):
         providers = {}
         async_providers = {}
+        multi_providers = {}
+        values = {}
 
         for base in bases:
             if isinstance(base, mcls):
                 providers.update(base.providers)
                 async_providers.update(async_providers)
+                for feature, contributions in base.multi_providers.items():
+                    multi_providers[feature] = list(contributions)
+                values.update(base.values)
 
         for attr in attrs.values():
             if hasattr(attr, "__provides__"):
-                if attr.__asyncproider__:
+                if getattr(attr, "__multiprovider__", False):
+                    multi_providers.setdefault(attr.__provides__, []).append(attr)
+                elif attr.__asyncproider__:
                     async_providers[attr.__provides__] = attr
                 else:
                     providers[attr.__provides__] = attr
 
         attrs["providers"] = providers
         attrs["async_providers"] = async_providers
+        attrs["multi_providers"] = multi_providers
+        attrs["values"] = values
 
         return super().__new__(mcls, name, bases, attrs)
 
@@ -74,6 +192,12 @@ class ModuleMeta(type):
 class Module(metaclass=ModuleMeta):
     # providers: SyncProviderMap
     # async_providers: AsyncProviderMap
+    # multi_providers: t.Dict[Feature, t.List[FeatureProvider]]
+    # values: t.Dict[Feature, t.Any]
+
+    # Module classes that must be started before this one when they are
+    # loaded together with `Injector.aload`.
+    requires: t.Sequence[t.Type["Module"]] = ()
 
     @classmethod
     def provider(cls, func: FeatureProvider) -> FeatureProvider:
@@ -94,6 +218,7 @@ class Module(metaclass=ModuleMeta):
         func: FeatureProvider,
         feature: t.Optional[Feature] = None,
         context: bool = False,
+        **options
     ) -> None:
         """Register `func` to be a provider for `feature`.
 
@@ -101,17 +226,42 @@ class Module(metaclass=ModuleMeta):
         inspected."""
 
         if feature:
-            mark_provides(func, feature, context)
+            mark_provides(func, feature, context, **options)
         else:
-            provider(func, context)
+            provider(func, context, **options)
 
-        if isasync(func):
+        if func.__multiprovider__:
+            cls.multi_providers.setdefault(func.__provides__, []).append(func)
+        elif isasync(func):
             cls.async_providers[func.__provides__] = func
         else:
             cls.providers[func.__provides__] = func
+            cls.values.pop(func.__provides__, None)
+
+    @classmethod
+    def bind(cls, feature: Feature, value: t.Any) -> None:
+        """Provide `value` for `feature`.
+
+        Bound values are injected as they are, without calling a provider.
+        They replace any sync or async provider for `feature` in the module."""
+        cls.values[feature] = value
+        cls.providers.pop(feature, None)
+        cls.async_providers.pop(feature, None)
 
     def load(self, injector: "Injector"):
         pass
 
     def unload(self, injector: "Injector"):
         pass
+
+    async def aload(
+        self, injector: "Injector"
+    ) -> t.Optional[t.Mapping[Feature, t.Any]]:
+        """Called when the module is loaded with `Injector.aload`.
+
+        Any features in the returned mapping are provided as singletons
+        by this module."""
+        pass
+
+    async def aunload(self, injector: "Injector"):
+        pass
@@ -0,0 +1,255 @@
+import time
+import random
+import asyncio
+import inspect
+import functools
+import threading
+import typing as t
+import weakref
+
+from .util import isasync
+
+
+FuncType = t.Callable[..., t.Any]
+
+
+class _Entry(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.has_value = False
+        self.value = None
+        self.fetched_at = None
+        self.refresh_at = None
+        self.refreshing = False
+        self.failures = 0
+        # The in-flight fetch of an async provider.
+        self.task = None
+
+
+class RefreshCache(object):
+    """Cache of provider results that are served stale while they are
+    refreshed in the background.
+
+    Results are cached per module and set of provider params. Once a
+    result is older than `ttl` (less up to `jitter` of it, so entries
+    created together don't refresh together), the next caller starts a
+    single background refresh and is given the cached result. A failed
+    refresh keeps the last good result and is retried after `backoff`
+    seconds, doubling on each failure up to `max_backoff`.
+    """
+
+    def __init__(
+        self,
+        func: FuncType,
+        ttl: float,
+        jitter: float = 0.1,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        self.func = func
+        self.ttl = ttl
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+
+        self.entries = weakref.WeakKeyDictionary()
+
+        self.refreshes = 0
+        self.failures = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.last_error = None
+
+    def _entry(self, module, params) -> _Entry:
+        key = tuple(sorted(params.items()))
+        # Only write to the shared maps the first time a key is used.
+        entries = self.entries.get(module)
+        if entries is None:
+            entries = self.entries.setdefault(module, {})
+        try:
+            return entries[key]
+        except KeyError:
+            return entries.setdefault(key, _Entry())
+
+    def _should_refresh(self, entry: _Entry) -> bool:
+        if entry.refreshing or self.clock() < entry.refresh_at:
+            return False
+        with entry.lock:
+            if entry.refreshing:
+                return False
+            entry.refreshing = True
+            return True
+
+    def _succeeded(self, entry: _Entry, value, started: float) -> None:
+        now = self.clock()
+        latency = now - started
+        self.refreshes += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+
+        entry.value = value
+        entry.has_value = True
+        entry.fetched_at = now
+        entry.refresh_at = now + self.ttl * (1 - self.jitter * random.random())
+        entry.failures = 0
+        entry.refreshing = False
+
+    def _failed(self, entry: _Entry, exc: Exception) -> None:
+        self.failures += 1
+        self.last_error = exc
+
+        entry.failures += 1
+        delay = min(self.backoff * 2 ** (entry.failures - 1), self.max_backoff)
+        entry.refresh_at = self.clock() + delay
+        entry.refreshing = False
+
+    def _fetch(self, entry: _Entry, module, params) -> None:
+        started = self.clock()
+        try:
+            value = self.func(module, **params)
+        except Exception as e:
+            self._failed(entry, e)
+            if not entry.has_value:
+                raise
+        else:
+            self._succeeded(entry, value, started)
+
+    async def _afetch(self, entry: _Entry, module, params) -> None:
+        started = self.clock()
+        try:
+            value = await self.func(module, **params)
+        except Exception as e:
+            self._failed(entry, e)
+            if not entry.has_value:
+                raise
+        else:
+            self._succeeded(entry, value, started)
+        finally:
+            entry.task = None
+            # Also when cancelled.
+            entry.refreshing = False
+
+    def get(self, module, params):
+        entry = self._entry(module, params)
+        if entry.has_value:
+            value = entry.value
+            if self._should_refresh(entry):
+                threading.Thread(
+                    target=self._fetch, args=(entry, module, params), daemon=True
+                ).start()
+            return value
+
+        with entry.lock:
+            if not entry.has_value:
+                self._fetch(entry, module, params)
+        return entry.value
+
+    def _start(self, entry: _Entry, module, params) -> None:
+        entry.task = asyncio.ensure_future(self._afetch(entry, module, params))
+        entry.task.add_done_callback(functools.partial(self._abandoned, entry))
+
+    @staticmethod
+    def _abandoned(entry: _Entry, task: asyncio.Future) -> None:
+        # Fetches are cancelled when their event loop shuts down, possibly
+        # before they even started, e.g. with an `asyncio.run` per task.
+        if task.cancelled() and entry.task is task:
+            entry.task = None
+            entry.refreshing = False
+
+    async def aget(self, module, params):
+        entry = self._entry(module, params)
+        task = entry.task
+        if task is not None and task.get_loop().is_closed():
+            # Fetches left pending when their event loop was closed.
+            entry.task = None
+            entry.refreshing = False
+
+        if entry.has_value:
+            if self._should_refresh(entry):
+                self._start(entry, module, params)
+            return entry.value
+
+        if entry.task is None:
+            self._start(entry, module, params)
+        await asyncio.shield(entry.task)
+        return entry.value
+
+    def staleness(self, module, **params) -> t.Optional[float]:
+        """Seconds since the cached result for `module` and `params` was
+        fetched, or `None` if there is no cached result."""
+        entry = self._entry(module, params)
+        if not entry.has_value:
+            return None
+        return self.clock() - entry.fetched_at
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        now = self.clock()
+        fetched = [
+            entry.fetched_at
+            for entries in list(self.entries.values())
+            for entry in list(entries.values())
+            if entry.has_value
+        ]
+        return {
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency,
+            "max_staleness": max((now - f for f in fetched), default=None),
+        }
+
+    def clear(self, module=None) -> None:
+        if module is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(module, None)
+
+
+def refresh(
+    ttl: float,
+    jitter: float = 0.1,
+    backoff: float = 1.0,
+    max_backoff: float = 60.0,
+    clock: t.Callable[[], float] = time.monotonic,
+):
+    """Cache the results of a sync or async provider for `ttl` seconds,
+    then serve them stale while they are refreshed in the background.
+
+    >>>
+    >>> class ConfigModule(diana.Module):
+    >>>     @diana.provider
+    >>>     @diana.refresh(ttl=30)
+    >>>     async def provide_flags(self) -> FeatureFlags:
+    >>>         return await fetch_flags()
+    >>>
+
+    Sync providers are refreshed on a background thread, async providers
+    on a task in the running event loop. The cache is available as the
+    provider's `__refresh__` attribute, see `RefreshCache`.
+    """
+
+    def _decorator(func: FuncType) -> FuncType:
+        target = getattr(func, "__wrapped__", func)
+        if inspect.isgeneratorfunction(target) or inspect.isasyncgenfunction(target):
+            raise TypeError("Context providers can not be refreshed")
+
+        cache = RefreshCache(func, ttl, jitter, backoff, max_backoff, clock)
+
+        if isasync(func):
+
+            @functools.wraps(func)
+            async def provide(module, **params):
+                return await cache.aget(module, params)
+
+        else:
+
+            @functools.wraps(func)
+            def provide(module, **params):
+                return cache.get(module, params)
+
+        provide.__refresh__ = cache
+        return provide
+
+    return _decorator
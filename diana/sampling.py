@@ -0,0 +1,128 @@
+import time
+import threading
+import typing as t
+
+
+# Histogram bucket `i` counts durations of less than `2 ** i` microseconds
+# (and at least half that); the last bucket counts anything longer.
+BUCKETS = 32
+
+OTHER = "<other>"
+
+Exporter = t.Callable[[t.Dict[str, t.Any]], t.Any]
+
+
+def bucket(seconds: float) -> int:
+    """The histogram bucket counting `seconds`."""
+    return min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+
+
+class Histogram(object):
+    __slots__ = ("total", "buckets")
+
+    def __init__(self):
+        self.total = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds: float) -> None:
+        self.total += seconds
+        self.buckets[bucket(seconds)] += 1
+
+    def export(self) -> t.Dict[str, t.Any]:
+        return {"total": self.total, "buckets": list(self.buckets)}
+
+
+class _Stats(object):
+    __slots__ = ("calls", "overhead", "inner")
+
+    def __init__(self):
+        self.calls = 0
+        self.overhead = Histogram()
+        self.inner = Histogram()
+
+
+class Sampler(object):
+    """Measures 1 in `every` injected calls on each thread, splitting the
+    time spent into injection overhead (resolving and exiting dependencies)
+    and time inside the injected function.
+
+    Measurements are aggregated per function into fixed size histograms.
+    Once `max_functions` functions are tracked, further functions are
+    aggregated together as `"<other>"`.
+
+    If `export` is given, it is called with a `snapshot` at most every
+    `interval` seconds, from the next sampled call, and the statistics are
+    reset.
+    """
+
+    def __init__(
+        self,
+        every: int = 100,
+        export: t.Optional[Exporter] = None,
+        interval: float = 60.0,
+        max_functions: int = 1000,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        self.every = every
+        self.export = export
+        self.interval = interval
+        self.max_functions = max_functions
+        self.clock = clock
+
+        # Calls are counted per thread, so counting isn't contended.
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._export_at = clock() + interval
+
+    def should_sample(self) -> bool:
+        local = self._local
+        count = getattr(local, "count", 0)
+        local.count = count + 1
+        return count % self.every == 0
+
+    def record(self, name: str, overhead: float, inner: float) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                if len(self._stats) >= self.max_functions:
+                    name = OTHER
+                stats = self._stats.setdefault(name, _Stats())
+
+            stats.calls += 1
+            stats.overhead.add(overhead)
+            stats.inner.add(inner)
+
+            due = self.export is not None and self.clock() >= self._export_at
+            if due:
+                self._export_at = self.clock() + self.interval
+
+        if due:
+            self.export(self.snapshot(reset=True))
+
+    def snapshot(self, reset: bool = False) -> t.Dict[str, t.Any]:
+        """The statistics for each function, by `module.qualname`."""
+        with self._lock:
+            stats = self._stats
+            if reset:
+                self._stats = {}
+
+            return {
+                "every": self.every,
+                "functions": {
+                    name: {
+                        "calls": s.calls,
+                        "overhead": s.overhead.export(),
+                        "inner": s.inner.export(),
+                    }
+                    for name, s in stats.items()
+                },
+            }
+
+    def flush(self) -> None:
+        """Export and reset the statistics now."""
+        with self._lock:
+            self._export_at = self.clock() + self.interval
+        snapshot = self.snapshot(reset=True)
+        if self.export is not None:
+            self.export(snapshot)
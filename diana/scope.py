@@ -0,0 +1,122 @@
+import asyncio
+import contextvars
+import typing as t
+
+
+_MISSING = object()
+
+
+class Scope(object):
+    """Dependencies resolved within an `Injector.scope`, reused by every
+    injected call made in it.
+
+    The scope is stored in a `contextvars.ContextVar`, so it applies to
+    tasks created within it, and to work submitted to executors with
+    `Injector.submit`. Only dependencies returned by providers are kept;
+    contexts are entered and exited for each call as usual, as are
+    providers passed unhashable params. Concurrent calls resolving the same
+    async dependency share a single `Resolution` of it.
+
+    A scope entered within another sees the dependencies resolved in the
+    outer scope, but those it resolves itself are dropped when it exits.
+    """
+
+    def __init__(self, var: contextvars.ContextVar):
+        self._var = var
+        self._token = None
+        self.parent = None
+        self.values = {}
+        self.pending = {}
+
+    def get(self, key) -> t.Any:
+        """The dependency resolved for `key`, or `_MISSING`."""
+        scope = self
+        while scope is not None:
+            value = scope.values.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            scope = scope.parent
+        return _MISSING
+
+    def set(self, key, value) -> t.Any:
+        """Keep `value` for `key`, unless another call resolved it first.
+        Returns the value kept."""
+        return self.values.setdefault(key, value)
+
+    def resolving(self, key) -> t.Optional["Resolution"]:
+        """The resolution of `key` in progress, if any."""
+        scope = self
+        while scope is not None:
+            resolution = scope.pending.get(key)
+            if resolution is not None:
+                return resolution
+            scope = scope.parent
+        return None
+
+    def resolution(self, key) -> "Resolution":
+        """A resolution of `key`, shared with calls resolving it until it
+        completes."""
+        resolution = self.pending[key] = Resolution(self, key)
+        return resolution
+
+    def __enter__(self) -> "Scope":
+        self.parent = self._var.get()
+        self._token = self._var.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._var.reset(self._token)
+
+    async def __aenter__(self) -> "Scope":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.__exit__(*exc_info)
+
+
+def scope_key(feature, params) -> t.Tuple[t.Any, t.Tuple]:
+    return feature, tuple(sorted(params.items())) if params else ()
+
+
+async def resolved(value):
+    return value
+
+
+class Resolution(object):
+    """An async dependency being resolved for a scope.
+
+    The awaitable is run in a task, so a call that is cancelled while
+    waiting for it doesn't cancel it for the others. The task is created
+    when first awaited, as resolutions for the bridge are started outside
+    its loop.
+    """
+
+    def __init__(self, scope: Scope, key):
+        self.scope = scope
+        self.key = key
+        self.keep = True
+        self.aw = None
+        self.task = None
+
+    def discard(self) -> None:
+        """Don't keep the result in the scope, e.g. as it is a fallback
+        rather than the provider's."""
+        self.keep = False
+
+    def start(self, aw) -> None:
+        """Resolve `aw`, once first awaited."""
+        self.aw = aw
+
+    async def _run(self, aw):
+        try:
+            value = await aw
+        finally:
+            del self.scope.pending[self.key]
+        if self.keep:
+            value = self.scope.set(self.key, value)
+        return value
+
+    async def wait(self) -> t.Any:
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._run(self.aw))
+        return await asyncio.shield(self.task)
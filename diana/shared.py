@@ -0,0 +1,147 @@
+import os
+import re
+import mmap
+import stat
+import tempfile
+import threading
+import typing as t
+import weakref
+
+
+def default_directory() -> str:
+    """A directory for shared resources private to the current user.
+
+    It is created if needed, and only used if it is owned by the current
+    user and not accessible to anyone else, so other users can't plant
+    resources for processes to map.
+    """
+    getuid = getattr(os, "getuid", None)
+    if getuid is None:
+        # Windows temporary directories are already per user.
+        return os.path.join(tempfile.gettempdir(), "diana-shared")
+
+    uid = getuid()
+    path = os.path.join(tempfile.gettempdir(), "diana-shared-{}".format(uid))
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != uid
+        or stat.S_IMODE(info.st_mode) & 0o077
+    ):
+        raise PermissionError(
+            "Shared resource directory {!r} is not private to the current "
+            "user".format(path)
+        )
+    return path
+
+
+class SharedResource(object):
+    """A read-only resource materialized once into a file, that each process
+    memory maps rather than building its own copy.
+
+    The first process to need the resource calls `build`, which returns the
+    data as a bytes-like object, and writes it to `path`. Every process,
+    including later ones, then maps the file and is given a read-only
+    `memoryview` of it, so the pages are shared between them. Views can be
+    wrapped without copying, e.g. with `numpy.frombuffer` or `array.array`.
+
+    If two processes build the resource at once, both write it and the last
+    one replaces the other's copy; a different `version` rebuilds it.
+
+    Resources are kept in `default_directory` unless `directory` is given,
+    in which case it should only be writable by trusted users.
+    """
+
+    def __init__(
+        self,
+        build: t.Callable[[t.Any], t.Any],
+        name: t.Optional[str] = None,
+        version: t.Any = None,
+        directory: t.Optional[str] = None,
+    ):
+        self.build = build
+        name = name or "{}.{}".format(build.__module__, build.__qualname__)
+        if version is not None:
+            name = "{}-{}".format(name, version)
+
+        self.directory = directory
+        self.filename = re.sub(r"[^\w.-]", "_", name) + ".bin"
+        self._path = None
+
+        self._lock = threading.Lock()
+        # The (mmap, view) of the resource mapped by each module.
+        self._mapped = weakref.WeakKeyDictionary()
+
+    @property
+    def path(self) -> str:
+        # The default directory is only checked once it's needed.
+        if self._path is None:
+            self._path = os.path.join(
+                self.directory or default_directory(), self.filename
+            )
+        return self._path
+
+    def get(self, module) -> memoryview:
+        try:
+            return self._mapped[module][1]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if module not in self._mapped:
+                if not os.path.exists(self.path):
+                    self._materialize(module)
+                self._mapped[module] = self._map()
+            return self._mapped[module][1]
+
+    def _materialize(self, module) -> None:
+        data = self.build(module)
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # Replace atomically, so other processes never map partial data.
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _map(self):
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files can't be mapped.
+                return None, memoryview(b"")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped, memoryview(mapped)
+
+    def release(self, module) -> None:
+        """Unmap the resource mapped by `module`.
+
+        If views of it are still in use elsewhere, it is unmapped once they
+        are garbage collected instead.
+        """
+        mapped, view = self._mapped.pop(module, (None, None))
+        if mapped is None:
+            return
+        try:
+            view.release()
+            mapped.close()
+        except BufferError:
+            pass
+
+    def remove(self) -> None:
+        """Remove the materialized file, so the resource is rebuilt the next
+        time a process needs it. Processes that have it mapped keep their
+        copy until they release it."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
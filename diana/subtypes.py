@@ -0,0 +1,81 @@
+import typing as t
+
+
+def _protocol_members(protocol: type) -> t.Set[str]:
+    members = set()
+    for base in protocol.__mro__:
+        if base is object or not getattr(base, "_is_protocol", False):
+            continue
+        names = set(base.__dict__) | set(getattr(base, "__annotations__", {}))
+        members.update(name for name in names if not name.startswith("_"))
+    return members
+
+
+def provides_for(provided, requested) -> bool:
+    """Whether a provider of the `provided` feature can provide the
+    `requested` feature, as a subclass or, for protocols, by having all of
+    its members."""
+    if not isinstance(provided, type) or not isinstance(requested, type):
+        return False
+
+    try:
+        return issubclass(provided, requested)
+    except TypeError:
+        # Protocols that aren't `runtime_checkable`, or have data members.
+        pass
+
+    if not getattr(requested, "_is_protocol", False):
+        return False
+    return all(hasattr(provided, name) for name in _protocol_members(requested))
+
+
+class SubtypeIndex(object):
+    """Index from requested features to the feature of the provider that
+    provides them as a subtype.
+
+    Each requested feature is matched against the provided features once,
+    the first time it is looked up, preferring the providers of the most
+    recently loaded modules. The index is then only updated as modules are
+    loaded and unloaded.
+    """
+
+    def __init__(self):
+        # Requested feature -> provided feature, or `None` for no match.
+        self._index = {}
+
+    def lookup(self, feature, provider_map, modules) -> t.Any:
+        """The feature in `provider_map` providing `feature`, or `None`."""
+        try:
+            provided = self._index[feature]
+        except KeyError:
+            pass
+        else:
+            if provided is None or provided in provider_map:
+                return provided
+
+        ranks = {module: i for i, module in enumerate(modules)}
+        best, best_rank = None, -1
+        for candidate, (module, _) in provider_map.items():
+            rank = ranks.get(module, -1)
+            if rank > best_rank and provides_for(candidate, feature):
+                best, best_rank = candidate, rank
+
+        self._index[feature] = best
+        return best
+
+    def loaded(self, features: t.Iterable[t.Any]) -> None:
+        """Update the index for the `features` of a newly loaded module,
+        which take precedence over any existing matches."""
+        features = list(features)
+        for requested in list(self._index):
+            for provided in features:
+                if provided is not requested and provides_for(provided, requested):
+                    self._index[requested] = provided
+                    break
+
+    def unloaded(self, features: t.Iterable[t.Any]) -> None:
+        """Forget the matches to the `features` of unloaded modules."""
+        features = set(features)
+        for requested, provided in list(self._index.items()):
+            if provided is not None and provided in features:
+                del self._index[requested]
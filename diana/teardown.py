@@ -0,0 +1,178 @@
+import time
+import asyncio
+import logging
+import functools
+import threading
+import collections
+import typing as t
+
+
+logger = logging.getLogger(__name__)
+
+ErrorHook = t.Callable[[BaseException, t.Any], t.Any]
+
+
+def log_error(exc: BaseException, cm) -> None:
+    logger.error("Deferred exit of %r failed", cm, exc_info=exc)
+
+
+class Teardown(object):
+    """Exits the contexts of providers marked `deferred_exit` off the
+    injected call's critical path.
+
+    Sync contexts are exited in order on a background thread, async
+    contexts in tasks on the event loop they were entered in. At most
+    `max_pending` exits of each kind are queued; beyond that, contexts are
+    exited before the injected call returns, as if they weren't deferred.
+
+    Errors raised while exiting are passed to `on_error` along with the
+    context manager, and counted in `failures`.
+    """
+
+    def __init__(self, max_pending: int = 100, on_error: ErrorHook = log_error):
+        self.max_pending = max_pending
+        self.on_error = on_error
+        self.failures = 0
+
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._running = 0
+        self._worker = None
+
+        self._tasks = set()
+
+    @property
+    def pending(self) -> int:
+        """The number of contexts waiting to be exited."""
+        return len(self._queue) + self._running + len(self._tasks)
+
+    def defer(self, cm) -> bool:
+        """Exit the sync context `cm` in the background. Returns `False`,
+        without queueing it, if too many exits are pending."""
+        with self._condition:
+            if len(self._queue) + self._running >= self.max_pending:
+                return False
+            self._queue.append(cm)
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._work, name="diana-teardown", daemon=True
+                )
+                self._worker.start()
+            self._condition.notify_all()
+        return True
+
+    def adefer(self, cm) -> bool:
+        """Exit the async context `cm` in a task. Returns `False`, without
+        scheduling it, if too many exits are pending."""
+        if len(self._tasks) >= self.max_pending:
+            return False
+        task = asyncio.ensure_future(cm.__aexit__(None, None, None))
+        self._tasks.add(task)
+        task.add_done_callback(functools.partial(self._exited, cm))
+        return True
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                cm = self._queue.popleft()
+                self._running += 1
+
+            try:
+                cm.__exit__(None, None, None)
+            except Exception as e:
+                self._failed(e, cm)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._condition.notify_all()
+
+    def _exited(self, cm, task: asyncio.Future) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._failed(task.exception(), cm)
+
+    def _failed(self, exc: BaseException, cm) -> None:
+        self.failures += 1
+        try:
+            self.on_error(exc, cm)
+        except Exception:
+            logger.exception("Error hook %r failed", self.on_error)
+
+    def drain(self, timeout: t.Optional[float] = None) -> bool:
+        """Wait for every queued sync exit to complete. Returns `False` if
+        they didn't within `timeout` seconds."""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._running:
+                wait = None if end is None else end - time.monotonic()
+                if wait is not None and wait <= 0:
+                    return False
+                self._condition.wait(wait)
+        return True
+
+    async def adrain(self, timeout: t.Optional[float] = None) -> bool:
+        """Wait for every deferred exit scheduled in the running loop, and
+        every queued sync exit, to complete. Returns `False` if they didn't
+        within `timeout` seconds."""
+        loop = asyncio.get_running_loop()
+        end = None if timeout is None else loop.time() + timeout
+
+        while True:
+            tasks = [task for task in self._tasks if task.get_loop() is loop]
+            if not tasks:
+                break
+            wait = None if end is None else end - loop.time()
+            if wait is not None and wait <= 0:
+                return False
+            await asyncio.wait(tasks, timeout=wait)
+
+        wait = None if end is None else max(0.0, end - loop.time())
+        return await loop.run_in_executor(None, self.drain, wait)
+
+
+class DeferredExit(object):
+    """Wraps a context provider so the contexts it returns are exited by
+    `teardown` after the injected call returns."""
+
+    def __init__(self, provider: t.Callable[..., t.Any], teardown: Teardown):
+        functools.update_wrapper(self, provider)
+        self.provider = provider
+        self.teardown = teardown
+
+    def __call__(self, module, **params):
+        cm = self.provider(module, **params)
+        if self.provider.__asyncproider__:
+            return _AsyncDeferredContext(cm, self.teardown)
+        return _DeferredContext(cm, self.teardown)
+
+
+class _DeferredContext(object):
+    def __init__(self, cm, teardown: Teardown):
+        self.cm = cm
+        self.teardown = teardown
+
+    def __enter__(self):
+        return self.cm.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        # Contexts exiting with an error are exited in place, so they can
+        # handle (or suppress) it.
+        if exc_type is None and self.teardown.defer(self.cm):
+            return False
+        return self.cm.__exit__(exc_type, exc, tb)
+
+
+class _AsyncDeferredContext(object):
+    def __init__(self, cm, teardown: Teardown):
+        self.cm = cm
+        self.teardown = teardown
+
+    async def __aenter__(self):
+        return await self.cm.__aenter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None and self.teardown.adefer(self.cm):
+            return False
+        return await self.cm.__aexit__(exc_type, exc, tb)
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import contextlib
+import contextvars
+import typing as t
+
+
+# The `time.monotonic` time by which the current request must complete.
+_deadline = contextvars.ContextVar("diana_deadline", default=None)
+
+
+class ProviderTimeout(asyncio.TimeoutError):
+    """Raised when an async provider takes longer than its timeout."""
+
+    def __init__(self, feature, timeout: float):
+        super().__init__(
+            "Provider for {!r} timed out after {:.3f}s".format(feature, timeout)
+        )
+        self.feature = feature
+        self.timeout = timeout
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+    """Bound the time async providers can take to resolve dependencies
+    within the block, including in any tasks created in it.
+
+    >>>
+    >>> with diana.deadline(0.5):
+    >>>     await handle(request)
+    >>>
+
+    Nested deadlines can only shorten the current one.
+    """
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        at = min(at, current)
+
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> t.Optional[float]:
+    """The seconds left until the current deadline, if there is one."""
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+async def _wait(aw, timeout: float) -> t.Optional[asyncio.Future]:
+    """Run `aw` for at most `timeout` seconds, returning its task, or `None`
+    if it was cancelled for taking longer.
+
+    Unlike `asyncio.wait_for`, a `TimeoutError` raised by `aw` itself isn't
+    mistaken for it timing out.
+    """
+    task = asyncio.ensure_future(aw)
+    try:
+        await asyncio.wait((task,), timeout=timeout)
+        if task.done():
+            return task
+        task.cancel()
+        await asyncio.wait((task,))
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    # It may have completed before the cancellation was delivered.
+    return None if task.cancelled() else task
+
+
+async def timed(aw, timeout: float, on_timeout: t.Callable[[], t.Any]):
+    """Await `aw` for at most `timeout` seconds, returning the result of
+    `on_timeout` if it takes longer."""
+    task = await _wait(aw, timeout)
+    if task is None:
+        return on_timeout()
+    return task.result()
+
+
+class TimedContext(object):
+    """Async context manager that enters `cm` within `timeout` seconds,
+    returning the result of `on_timeout` if it takes longer."""
+
+    def __init__(self, cm, timeout: float, on_timeout: t.Callable[[], t.Any]):
+        self.cm = cm
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self.entered = False
+
+    async def __aenter__(self):
+        task = await _wait(self.cm.__aenter__(), self.timeout)
+        if task is None:
+            return self.on_timeout()
+        value = task.result()
+        self.entered = True
+        return value
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.entered:
+            return await self.cm.__aexit__(exc_type, exc, tb)
+        return False
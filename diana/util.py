@@ -11,3 +11,86 @@ def isasync(func):
         or inspect.isasyncgenfunction(wrapped)
         or hasattr(func, "__aenter__")
     )
+
+
+class ConcurrentErrors(RuntimeError):
+    """Raised when more than one concurrently run operation fails.
+
+    The individual exceptions are available as `errors`, in the order
+    the operations were started.
+    """
+
+    def __init__(self, errors):
+        super().__init__(
+            "{} concurrent operations failed: {}".format(
+                len(errors), ", ".join(repr(e) for e in errors)
+            )
+        )
+        self.errors = list(errors)
+
+
+def raise_errors(errors):
+    if len(errors) == 1:
+        raise errors[0]
+    raise ConcurrentErrors(errors) from errors[0]
+
+
+async def gather(*aws):
+    """Await `aws` concurrently, waiting for all of them to complete even
+    if some fail.
+
+    A single failure is re-raised as is, several are raised together as
+    `ConcurrentErrors`.
+    """
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        raise_errors(errors)
+    return results
+
+
+class AsyncContextGroup(object):
+    """Enter and exit a group of independent async context managers
+    concurrently.
+
+    Entering yields the list of entered values. If any context fails to
+    enter, the ones that did are exited before the error is raised. An
+    exception is only suppressed on exit if every context suppresses it.
+    """
+
+    def __init__(self, managers):
+        self.managers = list(managers)
+        self.entered = []
+
+    async def __aenter__(self):
+        results = await asyncio.gather(
+            *(cm.__aenter__() for cm in self.managers), return_exceptions=True
+        )
+
+        errors = []
+        for cm, result in zip(self.managers, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                self.entered.append(cm)
+
+        if errors:
+            exc = errors[0]
+            try:
+                await self.__aexit__(type(exc), exc, exc.__traceback__)
+            except BaseException as e:
+                errors.append(e)
+            raise_errors(errors)
+
+        return results
+
+    async def __aexit__(self, exc_type, exc, tb):
+        entered, self.entered = self.entered, []
+        results = await asyncio.gather(
+            *(cm.__aexit__(exc_type, exc, tb) for cm in entered),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise_errors(errors)
+        return exc_type is not None and all(results)
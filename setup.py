@@ -28,6 +28,7 @@ setup(
     packages=["diana"],
     license="MIT",
     python_requires=">3.6, <4",
+    install_requires=['importlib_metadata; python_version < "3.8"'],
     tests_require=["pytest", "mock"],
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -0,0 +1,173 @@
+"""Budgets for the memory allocated by injection on each call.
+
+Each budget bounds the peak bytes allocated by injecting a call, over those
+allocated by calling the same (async) function without injection. They have
+some headroom over the current figures, so only changes adding allocations
+to the call path, e.g. copying dicts or creating closures, exceed them.
+"""
+import gc
+import sys
+import asyncio
+import contextlib
+import tracemalloc
+import typing as t
+
+import pytest
+
+import diana
+from diana.loadtest import _reset_peak
+
+
+Dependency = t.NewType("Dependency", str)
+ContextDependency = t.NewType("ContextDependency", str)
+AsyncDependency = t.NewType("AsyncDependency", str)
+
+
+class AllocationModule(diana.Module):
+    @diana.provider
+    def provide(self, length=1) -> Dependency:
+        return "dependency"
+
+    @diana.contextprovider
+    @contextlib.contextmanager
+    def provide_context(self) -> ContextDependency:
+        yield "context"
+
+    @diana.provider
+    async def provide_async(self) -> AsyncDependency:
+        return "async"
+
+
+@pytest.fixture(scope="module")
+def injector():
+    injector = diana.Injector()
+    injector.load(AllocationModule())
+    return injector
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def budget(current, before_311):
+    """The budget for the running Python version. Injection allocates less
+    before Python 3.11, so those versions have tighter budgets."""
+    return before_311 if sys.version_info < (3, 11) else current
+
+
+def allocated(call, repeat=50):
+    """The fewest bytes allocated at peak by any of `repeat` calls."""
+    # Warm up any lazily created state first.
+    call()
+    call()
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            _reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    return min(peaks)
+
+
+def sync_shapes(injector):
+    @injector
+    def injected(*, dep: Dependency):
+        return dep
+
+    @injector
+    def context(*, dep: ContextDependency):
+        return dep
+
+    @injector
+    @injector.param("dep", length=2)
+    def parametrized(*, dep: Dependency):
+        return dep
+
+    def plain(*, dep=None):
+        return dep
+
+    return {
+        "sync": (injected, plain, budget(1536, 1024)),
+        "context": (context, plain, budget(2560, 1536)),
+        "param": (parametrized, plain, budget(1536, 1024)),
+        "explicit": (
+            lambda: injected(dep="explicit"),
+            lambda: plain(dep="explicit"),
+            budget(1792, 1024),
+        ),
+    }
+
+
+def async_shapes(injector, loop):
+    @injector
+    async def coroutine(*, dep: AsyncDependency):
+        return dep
+
+    @injector
+    async def generator(*, dep: AsyncDependency):
+        yield dep
+
+    async def plain_coroutine(*, dep=None):
+        return dep
+
+    async def plain_generator(*, dep=None):
+        yield dep
+
+    async def consume(agen):
+        async for _ in agen:
+            pass
+
+    return {
+        "coroutine": (
+            lambda: loop.run_until_complete(coroutine()),
+            lambda: loop.run_until_complete(plain_coroutine()),
+            budget(2048, 1024),
+        ),
+        "generator": (
+            lambda: loop.run_until_complete(consume(generator())),
+            lambda: loop.run_until_complete(consume(plain_generator())),
+            budget(1792, 1024),
+        ),
+    }
+
+
+@pytest.mark.parametrize("shape", ["sync", "context", "param", "explicit"])
+def test_sync_budget(injector, shape):
+    call, baseline, budget = sync_shapes(injector)[shape]
+    assert allocated(call) - allocated(baseline) <= budget
+
+
+@pytest.mark.parametrize("shape", ["coroutine", "generator"])
+def test_async_budget(injector, loop, shape):
+    call, baseline, budget = async_shapes(injector, loop)[shape]
+    assert allocated(call) - allocated(baseline) <= budget
+
+
+def test_no_retained_allocations(injector):
+    call, _, _ = sync_shapes(injector)["context"]
+
+    tracemalloc.start()
+    try:
+        # Free lists refilled while tracing, and garbage the collector
+        # hasn't reached yet, aren't retained by the calls.
+        for _ in range(1000):
+            call()
+        gc.collect()
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(1000):
+            call()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert after - before < 1024
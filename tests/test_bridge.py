@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import contextlib
+import typing as t
+
+import pytest
+
+import diana
+from diana.bridge import Bridge
+
+
+Client = t.NewType("Client", str)
+Session = t.NewType("Session", str)
+Missing = t.NewType("Missing", str)
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def injector(events):
+    class AsyncModule(diana.Module):
+        @diana.provider
+        async def provide_client(self, name="client") -> Client:
+            await asyncio.sleep(0)
+            return name
+
+        @diana.contextprovider
+        @contextlib.asynccontextmanager
+        async def provide_session(self) -> Session:
+            events.append("enter")
+            yield "session"
+            events.append("exit")
+
+    injector = diana.Injector(bridge=True)
+    injector.load(AsyncModule())
+    yield injector
+    injector.bridge.close()
+
+
+def test_bridge(injector, events):
+    @injector
+    @injector.param("client", name="bridged")
+    def target(*, client: Client, session: Session, missing: Missing = None):
+        events.append("call")
+        return client, session, missing
+
+    assert target() == ("bridged", "session", None)
+    assert events == ["enter", "call", "exit"]
+    assert injector.get(Client) == "client"
+
+    with pytest.raises(diana.NoProvider):
+        injector.get(Missing)
+
+
+def test_bridge_reuses_loop(injector):
+    @injector
+    def target(*, client: Client):
+        return client
+
+    target()
+    thread = injector.bridge._thread
+    target()
+    assert injector.bridge._thread is thread
+
+
+def test_bridge_threads(injector):
+    @injector
+    def target(*, client: Client):
+        return client
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(target())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["client"] * 8
+
+
+def test_bridge_override(injector):
+    async def provide(module) -> Client:
+        return "override"
+
+    diana.provider(provide)
+
+    with injector.override({Client: provide}):
+        assert injector.get(Client) == "override"
+
+
+def test_bridge_frozen(injector):
+    @injector
+    def target(*, client: Client = None):
+        return client
+
+    injector.freeze()
+    assert target() == "client"
+
+
+@pytest.mark.asyncio
+async def test_bridge_async_timeout_fallback():
+    class SlowModule(diana.Module):
+        @diana.provider(timeout=0.05, timeout_fallback=True)
+        async def provide_client(self) -> Client:
+            await asyncio.sleep(1)
+            return "slow"
+
+    injector = diana.Injector(bridge=True)
+    injector.load(SlowModule())
+
+    @injector
+    async def target(*, client: Client = None):
+        return client
+
+    # Async callers fall back to the default, without using the bridge.
+    assert await target() is None
+    assert injector.bridge._loop is None
+
+
+def test_disabled():
+    class AsyncModule(diana.Module):
+        @diana.provider
+        async def provide_client(self) -> Client:
+            return "client"
+
+    injector = diana.Injector()
+    injector.load(AsyncModule())
+
+    with pytest.raises(diana.NoProvider):
+        injector.get(Client)
+
+
+def test_bridge_errors():
+    bridge = Bridge()
+
+    async def fail():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        bridge.run(fail())
+
+    bridge.close()
+    assert bridge.run(asyncio.sleep(0, "restarted")) == "restarted"
+    bridge.close()
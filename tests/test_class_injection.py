@@ -0,0 +1,191 @@
+import copy
+import pickle
+import functools
+import contextlib
+import typing as t
+
+import pytest
+
+import diana
+from diana.injector import InjectedAttribute
+
+
+Database = t.NewType("Database", str)
+Cache = t.NewType("Cache", str)
+Session = t.NewType("Session", str)
+
+
+@diana.injector
+def module_function(*, database: Database = "default"):
+    return database
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def injector(calls):
+    class ServiceModule(diana.Module):
+        @diana.provider
+        def provide_database(self, name="main") -> Database:
+            calls.append(Database)
+            return "database:" + name
+
+        @diana.provider
+        def provide_cache(self) -> Cache:
+            calls.append(Cache)
+            return "cache"
+
+        @diana.contextprovider
+        @contextlib.contextmanager
+        def provide_session(self) -> Session:
+            yield "session"
+
+    injector = diana.Injector()
+    injector.load(ServiceModule())
+    return injector
+
+
+def test_constructor(injector, calls):
+    @injector
+    class Service(object):
+        def __init__(self, prefix, *, database: Database):
+            self.prefix = prefix
+            self.database = database
+
+        def query(self):
+            return self.prefix + self.database
+
+    service = Service("> ")
+    assert service.query() == "> database:main"
+    assert service.query() == "> database:main"
+    assert calls == [Database]
+
+    assert Service("", database="explicit").database == "explicit"
+    assert isinstance(service, Service)
+
+
+def test_constructor_param(injector):
+    @injector
+    @injector.param("database", name="replica")
+    class Service(object):
+        def __init__(self, *, database: Database):
+            self.database = database
+
+    assert Service().database == "database:replica"
+
+
+def test_subclass(injector):
+    @injector
+    class Service(object):
+        def __init__(self, *, database: Database, cache=None):
+            self.database = database
+            self.cache = cache
+
+    @injector.inject(cache=Cache)
+    @injector.param("database", name="replica")
+    class CachedService(Service):
+        pass
+
+    assert CachedService().database == "database:replica"
+    assert CachedService().cache == "cache"
+
+    assert Service().database == "database:main"
+    assert Service().cache is None
+    assert Service.__dependencies__.dependencies == {"database": Database}
+
+
+def test_attribute(injector, calls):
+    class Service(object):
+        database: Database = injector.attribute(name="replica")
+        cache = injector.attribute(Cache)
+
+    service = Service()
+    assert calls == []
+
+    assert service.database == "database:replica"
+    assert service.database == "database:replica"
+    assert service.cache == "cache"
+    assert calls == [Database, Cache]
+
+    assert Service().cache == "cache"
+    assert calls == [Database, Cache, Cache]
+
+    assert isinstance(Service.cache, InjectedAttribute)
+
+
+def test_attribute_context(injector):
+    class Service(object):
+        session: Session = injector.attribute()
+
+    with pytest.raises(TypeError):
+        Service().session
+
+
+def test_methods(injector):
+    class Service(object):
+        prefix = "> "
+
+        @injector
+        def method(self, suffix, *, database: Database):
+            return self.prefix + database + suffix
+
+        @injector
+        @classmethod
+        def class_method(cls, *, database: Database):
+            return cls, database
+
+        @classmethod
+        @injector
+        def class_method_outer(cls, *, database: Database):
+            return cls, database
+
+        @injector
+        @staticmethod
+        def static_method(*, database: Database):
+            return database
+
+    service = Service()
+    assert service.method("!") == "> database:main!"
+    assert Service.method(service, "?") == "> database:main?"
+    assert Service.class_method() == (Service, "database:main")
+    assert service.class_method() == (Service, "database:main")
+    assert Service.class_method_outer() == (Service, "database:main")
+    assert Service.static_method() == service.static_method() == "database:main"
+    assert Service.__dict__["class_method"].__dependencies__.dependencies == {
+        "database": Database
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_method(injector):
+    class Service(object):
+        @injector
+        async def method(self, *, cache: Cache):
+            return self, cache
+
+    service = Service()
+    assert await service.method() == (service, "cache")
+
+
+def test_partial(injector):
+    def query(prefix, *, database: Database):
+        return prefix + database
+
+    injected = injector(functools.partial(query, "> "))
+    assert injected() == "> database:main"
+
+    class Service(object):
+        # Like partial objects, isn't bound to instances.
+        query = injected
+
+    assert Service().query() == "> database:main"
+
+
+def test_pickle():
+    assert pickle.loads(pickle.dumps(module_function)) is module_function
+    assert copy.deepcopy(module_function) is module_function
+    assert copy.copy(module_function) is module_function
+    assert module_function() == "default"
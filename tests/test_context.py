@@ -1,4 +1,5 @@
 import typing as t
+import asyncio
 import contextlib
 
 import pytest
@@ -61,3 +62,97 @@ async def test_within_context_async(injector):
 
     await uses_state()
 
+
+Lock = t.NewType("Lock", str)
+Lease = t.NewType("Lease", str)
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def concurrent_injector(events):
+    def make(name, fail=None):
+        @contextlib.asynccontextmanager
+        async def provide(self):
+            events.append(("enter", name))
+            await asyncio.sleep(0)
+            if fail == "enter":
+                raise ValueError(name)
+            events.append(("entered", name))
+            try:
+                yield name
+            finally:
+                events.append(("exit", name))
+                await asyncio.sleep(0)
+                events.append(("exited", name))
+            if fail == "exit":
+                raise ValueError(name)
+
+        return provide
+
+    def build(fail_lock=None, fail_lease=None):
+        class ConcurrentModule(diana.Module):
+            provide_lock = diana.provides(Lock, context=True)(make("lock", fail_lock))
+            provide_lease = diana.provides(Lease, context=True)(
+                make("lease", fail_lease)
+            )
+
+        injector = diana.Injector(concurrent=True)
+        injector.load(ConcurrentModule())
+        return injector
+
+    return build
+
+
+@pytest.mark.asyncio
+async def test_concurrent_contexts(concurrent_injector, events):
+    injector = concurrent_injector()
+
+    @injector
+    async def uses_both(*, lock: Lock, lease: Lease):
+        events.append(("call", None))
+        return lock, lease
+
+    assert await uses_both() == ("lock", "lease")
+    assert [e for e, _ in events] == [
+        "enter",
+        "enter",
+        "entered",
+        "entered",
+        "call",
+        "exit",
+        "exit",
+        "exited",
+        "exited",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_contexts_enter_error(concurrent_injector, events):
+    injector = concurrent_injector(fail_lease="enter")
+
+    @injector
+    async def uses_both(*, lock: Lock, lease: Lease):
+        raise AssertionError("Should not be called")
+
+    with pytest.raises(ValueError):
+        await uses_both()
+
+    assert ("exited", "lock") in events
+
+
+@pytest.mark.asyncio
+async def test_concurrent_contexts_exit_errors(concurrent_injector, events):
+    injector = concurrent_injector(fail_lock="exit", fail_lease="exit")
+
+    @injector
+    async def uses_both(*, lock: Lock, lease: Lease):
+        pass
+
+    with pytest.raises(diana.ConcurrentErrors) as exc_info:
+        await uses_both()
+
+    assert sorted(str(e) for e in exc_info.value.errors) == ["lease", "lock"]
@@ -1,3 +1,5 @@
+import sys
+import threading
 import typing as t
 import contextlib
 from functools import partial
@@ -210,3 +212,190 @@ async def test_async(target, dep_value, _target_func):
     else:
         raise RuntimeError()
 
+
+@pytest.fixture
+def value_injector(dep_type):
+    class ValueModule(diana.Module):
+        pass
+
+    ValueModule.bind(dep_type, "bound")
+
+    injector = diana.Injector()
+    injector.load(ValueModule())
+    return injector
+
+
+def test_bind_value(value_injector, dep_type):
+    @value_injector
+    def target(*, value: dep_type):
+        return value
+
+    assert target() == "bound"
+    assert value_injector.get(dep_type) == "bound"
+
+    value_injector.bind(dep_type, "injector")
+    assert target() == "injector"
+
+
+@pytest.mark.asyncio
+async def test_bind_value_async(value_injector, dep_type):
+    @value_injector
+    async def target(*, value: dep_type):
+        return value
+
+    assert (await target()) == "bound"
+
+    with value_injector.override({dep_type: "override"}):
+        assert (await target()) == "override"
+
+
+@pytest.mark.parametrize("execution_model", [SYNC], indirect=True)
+def test_bind_precedence(injector, dep_type):
+    class ValueModule(diana.Module):
+        pass
+
+    ValueModule.bind(dep_type, "bound")
+    values = ValueModule()
+
+    injector.load(values)
+    assert injector.get(dep_type) == "bound"
+
+    injector.unload(values)
+    assert injector.get(dep_type) != "bound"
+
+    injector.bind(dep_type, "injector")
+    injector.load(values)
+    assert injector.get(dep_type) == "injector"
+
+    injector.unload(values)
+    assert injector.get(dep_type) == "injector"
+
+
+@pytest.mark.parametrize("execution_model", [SYNC], indirect=True)
+def test_frozen_sync(injector, target, dep_value, _target_func):
+    summary = injector.freeze()
+    assert summary["specialized"] == summary["functions"] == 1
+
+    test_sync(target, dep_value, _target_func)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("execution_model", [ASYNC], indirect=True)
+async def test_frozen_async(injector, target, dep_value, _target_func):
+    summary = injector.freeze()
+    assert summary["specialized"] == summary["functions"] == 1
+
+    await test_async(target, dep_value, _target_func)
+
+
+@pytest.mark.parametrize("execution_model", [SYNC], indirect=True)
+def test_frozen(injector, module, dep_type, dep_value):
+    injector.freeze()
+
+    with pytest.raises(diana.InjectorFrozen):
+        injector.load(module)
+    with pytest.raises(diana.InjectorFrozen):
+        injector.unload(module)
+    with pytest.raises(diana.InjectorFrozen):
+        injector.bind(dep_type, "value")
+    with pytest.raises(diana.InjectorFrozen):
+        injector.override({dep_type: "value"})
+
+    # Functions wrapped after freezing are specialized too.
+    @injector
+    @injector.param("value", length=3)
+    def target(*, value: dep_type, missing: int = 5):
+        return value, missing
+
+    assert target.__dependencies__._frozen_plan is not None
+    assert target() == (dep_value * 3, 5)
+    assert target(value="explicit") == ("explicit", 5)
+
+    @injector
+    def unresolvable(*, missing: int):
+        pass
+
+    assert injector.freeze() == {"modules": 1, "functions": 2, "specialized": 1}
+    with pytest.raises(diana.NoProvider):
+        unresolvable()
+
+
+@pytest.mark.parametrize("execution_model", [SYNC], indirect=True)
+def test_with_params(injector, dep_type, dep_value):
+    @injector
+    @injector.param("value", length=2)
+    def target(*, value: dep_type):
+        return value
+
+    variant = target.with_params("value", length=3)
+    assert variant() == dep_value * 3
+    assert target() == dep_value * 2
+    assert target.with_params("value", length=3) is variant
+    assert variant.__dependencies__.signature is target.__dependencies__.signature
+
+    injector.freeze()
+    assert variant() == dep_value * 3
+    assert target.with_params("value", length=4)() == dep_value * 4
+
+
+def test_with_params_unhashable():
+    Tags = t.NewType("Tags", list)
+
+    class TagModule(diana.Module):
+        @diana.provider
+        def provide_tags(self, tags=()) -> Tags:
+            return list(tags)
+
+    injector = diana.Injector()
+    injector.load(TagModule())
+
+    @injector
+    def target(*, tags: Tags):
+        return tags
+
+    variant = target.with_params("tags", tags=["x"])
+    assert variant() == ["x"]
+    assert target.with_params("tags", tags=["x"]) is not variant
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("execution_model", [ASYNC], indirect=True)
+async def test_with_params_async(injector, dep_type, dep_value):
+    @injector
+    async def target(*, value: dep_type):
+        return value
+
+    assert await target.with_params("value", length=3)() == dep_value * 3
+    assert await target() == dep_value
+
+
+@pytest.mark.parametrize("execution_model", [SYNC], indirect=True)
+def test_unload_concurrent_reads(injector, dep_type):
+    class OtherModule(diana.Module):
+        pass
+
+    other = OtherModule()
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                injector.get(dep_type)
+            except diana.NoProvider as e:
+                errors.append(e)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(2000):
+            injector.load(other)
+            injector.unload(other)
+    finally:
+        done.set()
+        reader.join()
+        sys.setswitchinterval(interval)
+
+    assert errors == []
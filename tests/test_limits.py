@@ -0,0 +1,139 @@
+import time
+import asyncio
+import threading
+import contextlib
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import diana
+
+
+Token = t.NewType("Token", str)
+Connection = t.NewType("Connection", str)
+
+
+class Tracker(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.active -= 1
+
+
+@pytest.fixture
+def tracker():
+    return Tracker()
+
+
+def make_injector(tracker, **options):
+    class LimitedModule(diana.Module):
+        @diana.provider(**options)
+        def provide_token(self, scope="") -> Token:
+            with tracker:
+                time.sleep(0.01)
+                return "token" + scope
+
+        @diana.provider(**options)
+        async def provide_token_async(self, scope="") -> Token:
+            with tracker:
+                await asyncio.sleep(0.01)
+                return "token" + scope
+
+    injector = diana.Injector()
+    injector.load(LimitedModule())
+    return injector
+
+
+def test_max_concurrency(tracker):
+    injector = make_injector(tracker, max_concurrency=2)
+
+    with ThreadPoolExecutor(6) as pool:
+        results = list(pool.map(lambda _: injector.get(Token), range(6)))
+
+    assert results == ["token"] * 6
+    assert tracker.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_async(tracker):
+    injector = make_injector(tracker, max_concurrency=2)
+
+    @injector
+    async def get_token(*, token: Token):
+        return token
+
+    assert await asyncio.gather(*(get_token() for _ in range(6))) == ["token"] * 6
+    assert tracker.peak == 2
+
+
+def test_coalesce(tracker):
+    injector = make_injector(tracker, coalesce=True)
+
+    def get(i):
+        return injector.get(Token, {"scope": str(i % 2)})
+
+    with ThreadPoolExecutor(6) as pool:
+        results = list(pool.map(get, range(6)))
+
+    assert results == ["token0", "token1"] * 3
+    assert tracker.calls < 6
+
+
+@pytest.mark.asyncio
+async def test_coalesce_async(tracker):
+    injector = make_injector(tracker, coalesce=True)
+
+    @injector
+    @injector.param("token", scope="a")
+    async def get_token(*, token: Token):
+        return token
+
+    assert await asyncio.gather(*(get_token() for _ in range(6))) == ["tokena"] * 6
+    assert tracker.calls == 1
+
+    assert await get_token() == "tokena"
+    assert tracker.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_context(tracker):
+    class PoolModule(diana.Module):
+        @diana.contextprovider(max_concurrency=1)
+        @contextlib.asynccontextmanager
+        async def provide_connection(self) -> Connection:
+            with tracker:
+                yield "connection"
+
+    injector = diana.Injector()
+    injector.load(PoolModule())
+
+    @injector
+    async def use_connection(*, connection: Connection):
+        await asyncio.sleep(0.01)
+        return connection
+
+    assert await asyncio.gather(*(use_connection() for _ in range(3))) == [
+        "connection"
+    ] * 3
+    assert tracker.peak == 1
+
+
+def test_coalesce_context():
+    with pytest.raises(ValueError):
+
+        @diana.contextprovider(coalesce=True)
+        @contextlib.contextmanager
+        def provide(self) -> Connection:
+            yield
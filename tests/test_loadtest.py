@@ -0,0 +1,39 @@
+import pytest
+
+from diana import loadtest
+
+
+@pytest.fixture
+def graph():
+    return loadtest.build(features=6, async_ratio=0.5, context_ratio=0.5, seed=1)
+
+
+def test_build(graph):
+    assert len(graph.features) == 6
+    assert graph.sync_caller() == len(graph.injector.providers)
+
+
+@pytest.mark.asyncio
+async def test_run_async(graph):
+    report = await loadtest.run_async(graph, concurrency=4, calls=20)
+    assert report["calls"] == 20
+    assert report["latency"]["p50"] <= report["latency"]["max"]
+    assert "loop_lag" in report
+
+
+def test_run_threads(graph):
+    report = loadtest.run_threads(graph, concurrency=4, calls=20)
+    assert report["calls"] == 20
+    assert report["throughput"] > 0
+
+
+def test_main(capsys):
+    report = loadtest.main(["--calls", "10", "--concurrency", "2", "--allocations"])
+    assert report["allocated_per_call"] > 0
+    assert "throughput" in capsys.readouterr().out
+
+
+def test_percentile():
+    assert loadtest.percentile([1, 2, 3, 4, 5], 50) == 3
+    assert loadtest.percentile([1, 2, 3, 4, 5], 100) == 5
+    assert loadtest.percentile([], 50) == 0.0
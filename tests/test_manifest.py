@@ -0,0 +1,243 @@
+import sys
+import json
+import inspect
+import textwrap
+import typing as t
+
+import pytest
+
+import diana
+from diana import manifest
+
+
+VIEWS = textwrap.dedent(
+    """
+    import diana
+    from .types import Frob
+
+    injector = diana.Injector()
+
+    @injector
+    def get_frob(prefix, suffix="!", *, frob: Frob, sep=" "):
+        return prefix + sep + frob + suffix
+    """
+)
+
+
+def unimport(prefix):
+    for name in [m for m in sys.modules if m.startswith(prefix)]:
+        del sys.modules[name]
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "lazypkg"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "types.py").write_text(
+        textwrap.dedent(
+            """
+            import typing as t
+
+            Frob = t.NewType("Frob", str)
+            Knob = t.NewType("Knob", str)
+            Plugin = t.NewType("Plugin", str)
+            """
+        )
+    )
+    (root / "modules.py").write_text(
+        textwrap.dedent(
+            """
+            import diana
+            from .types import Frob, Knob, Plugin
+
+            IMPORTED = True
+
+            class FrobModule(diana.Module):
+                @diana.provider
+                def provide_frob(self) -> Frob:
+                    return "frob"
+
+                @diana.provider
+                async def provide_knob(self) -> Knob:
+                    return "knob"
+
+                @diana.provider(multi=True)
+                def provide_plugin(self) -> Plugin:
+                    return "plugin"
+            """
+        )
+    )
+    (root / "views.py").write_text(VIEWS)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield root
+    manifest.deactivate()
+    unimport("lazypkg")
+
+
+def newtype_id(module, name):
+    if sys.version_info < (3, 10):
+        return "typing.NewType[{}]".format(name)
+    return "{}.{}".format(module, name)
+
+
+def test_feature_id():
+    Frob = t.NewType("Frob", str)
+    assert manifest.feature_id(int) == "builtins.int"
+    assert manifest.feature_id(Frob) == newtype_id("test_manifest", "Frob")
+    assert manifest.feature_id(t.Sequence[Frob]) == (
+        "collections.abc.Sequence[{}]".format(newtype_id("test_manifest", "Frob"))
+    )
+
+
+FROB = newtype_id("lazypkg.types", "Frob")
+KNOB = newtype_id("lazypkg.types", "Knob")
+PLUGIN = newtype_id("lazypkg.types", "Plugin")
+
+
+def test_build_manifest(package, tmp_path, capsys):
+    manifest.main(["lazypkg.modules:FrobModule", "--scan", "lazypkg.views"])
+    built = json.loads(capsys.readouterr().out)
+    assert built == {
+        "version": 2,
+        "features": {
+            FROB: "lazypkg.modules:FrobModule",
+            KNOB: "lazypkg.modules:FrobModule",
+            "collections.abc.Sequence[{}]".format(PLUGIN): (
+                "lazypkg.modules:FrobModule"
+            ),
+        },
+        "providers": {
+            "lazypkg.modules:FrobModule.provide_frob": {"feature": FROB},
+            "lazypkg.modules:FrobModule.provide_knob": {"feature": KNOB},
+            "lazypkg.modules:FrobModule.provide_plugin": {"feature": PLUGIN},
+        },
+        "functions": {
+            "lazypkg.views:get_frob": {
+                "positional": ["prefix", "suffix"],
+                "keyword": ["frob", "sep"],
+                "inject": {"frob": FROB},
+            }
+        },
+        "checksums": {
+            "lazypkg.modules": manifest.source_checksum("lazypkg.modules"),
+            "lazypkg.views": manifest.source_checksum("lazypkg.views"),
+        },
+    }
+
+    path = str(tmp_path / "manifest.json")
+    manifest.main(["lazypkg.modules:FrobModule", "-o", path])
+    assert manifest.read_manifest(path)["functions"] == {}
+
+
+def test_build_manifest_collision():
+    class AModule(diana.Module):
+        @diana.provider
+        def provide_frob(self) -> t.NewType("Frob", str):
+            return "a"
+
+    class BModule(diana.Module):
+        @diana.provider
+        def provide_frob(self) -> t.NewType("Frob", str):
+            return "b"
+
+    manifest.build_manifest(AModule, AModule)
+    with pytest.raises(ValueError, match="has the same id"):
+        manifest.build_manifest(AModule, BModule)
+
+
+def test_main(package, capsys):
+    from diana.__main__ import main
+
+    main(["manifest", "lazypkg.modules:FrobModule"])
+    assert json.loads(capsys.readouterr().out)["features"]
+
+    with pytest.raises(SystemExit):
+        main(["unknown"])
+
+
+def test_read_manifest_v1(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"version": 1, "features": {}}))
+    assert manifest.read_manifest(str(path)) == {"version": 1, "features": {}}
+
+
+def build_and_activate(tmp_path, capsys):
+    path = str(tmp_path / "manifest.json")
+    manifest.main(["lazypkg.modules:FrobModule", "--scan", "lazypkg.views", "-o", path])
+    unimport("lazypkg")
+    manifest.activate(path)
+
+
+def test_activate(package, tmp_path, capsys, monkeypatch):
+    build_and_activate(tmp_path, capsys)
+
+    def signature(func):
+        raise AssertionError("Inspected {!r}".format(func))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(inspect, "signature", signature)
+        from lazypkg.modules import FrobModule
+        from lazypkg.views import injector, get_frob
+
+    injector.load(FrobModule())
+    assert get_frob("a") == "a frob!"
+    assert get_frob("a", "?", sep="-") == "a-frob?"
+    assert get_frob.__dependencies__._signature is None
+
+
+def test_activate_changed(package, tmp_path, capsys):
+    build_and_activate(tmp_path, capsys)
+    (package / "views.py").write_text(VIEWS.replace('sep=" "', 'sep="_"'))
+
+    from lazypkg.modules import FrobModule
+    from lazypkg.views import injector, get_frob
+
+    injector.load(FrobModule())
+    assert get_frob("a") == "a_frob!"
+    assert get_frob.__dependencies__._signature is not None
+
+
+def test_lazy(package, tmp_path):
+    injector = diana.Injector()
+    injector.register_lazy(
+        {
+            "version": 1,
+            "features": {FROB: "lazypkg.modules:FrobModule"},
+        }
+    )
+    assert "lazypkg.modules" not in sys.modules
+
+    from lazypkg.types import Frob
+
+    @injector
+    def get_frob(*, frob: Frob):
+        return frob
+
+    assert get_frob() == "frob"
+    assert "lazypkg.modules" in sys.modules
+    assert len(injector.modules) == 1
+
+    assert get_frob() == "frob"
+    assert len(injector.modules) == 1
+
+
+@pytest.mark.asyncio
+async def test_lazy_async(package):
+    injector = diana.Injector()
+    injector.register_lazy({KNOB: "lazypkg.modules:FrobModule"})
+
+    from lazypkg.types import Knob
+
+    @injector
+    async def get_knob(*, knob: Knob):
+        return knob
+
+    assert await get_knob() == "knob"
+
+
+def test_lazy_freeze(package):
+    injector = diana.Injector()
+    injector.register_lazy({FROB: "lazypkg.modules:FrobModule"})
+    injector.freeze()
+    assert len(injector.modules) == 1
@@ -1,3 +1,9 @@
+import asyncio
+import typing as t
+
+import pytest
+
+import diana
 from diana.module import Module, provider, provides
 
 
@@ -101,3 +107,152 @@ def test_decorator():
         int: async_p_int,
         str: async_p_str,
     }
+
+
+Pool = t.NewType("Pool", str)
+Config = t.NewType("Config", dict)
+
+
+@pytest.fixture
+def lifecycle():
+    events = []
+
+    class ConfigModule(Module):
+        async def aload(self, injector):
+            events.append("config:start")
+            await asyncio.sleep(0)
+            events.append("config:started")
+            return {Config: {"dsn": "db://"}}
+
+        async def aunload(self, injector):
+            events.append("config:stop")
+
+    class PoolModule(Module):
+        requires = (ConfigModule,)
+
+        def load(self, injector):
+            events.append("pool:load")
+
+        def unload(self, injector):
+            events.append("pool:unload")
+
+        async def aload(self, injector):
+            events.append("pool:start")
+            if self.fail:
+                raise ValueError()
+            # Features of required modules can be used once they started.
+            return {Pool: Pool(injector.get(Config)["dsn"])}
+
+        async def aunload(self, injector):
+            events.append("pool:stop")
+
+    class CacheModule(Module):
+        async def aload(self, injector):
+            events.append("cache:start")
+            await asyncio.sleep(0)
+            events.append("cache:started")
+
+    PoolModule.fail = False
+    return events, ConfigModule, PoolModule, CacheModule
+
+
+@pytest.mark.asyncio
+async def test_aload(lifecycle):
+    events, ConfigModule, PoolModule, CacheModule = lifecycle
+
+    injector = diana.Injector()
+    await injector.aload(PoolModule(), ConfigModule(), CacheModule())
+
+    assert events.index("config:started") < events.index("pool:start")
+    assert events.index("cache:start") < events.index("config:started")
+    assert injector.get(Pool) == "db://"
+    assert injector.get(Config) == {"dsn": "db://"}
+
+
+@pytest.mark.asyncio
+async def test_aload_error(lifecycle):
+    events, ConfigModule, PoolModule, CacheModule = lifecycle
+    PoolModule.fail = True
+
+    injector = diana.Injector()
+    with pytest.raises(ValueError):
+        await injector.aload(PoolModule(), ConfigModule(), CacheModule())
+
+    assert injector.modules == []
+    assert "config:stop" in events
+    assert "pool:stop" not in events
+    assert "pool:unload" in events
+    with pytest.raises(diana.NoProvider):
+        injector.get(Config)
+
+
+@pytest.mark.asyncio
+async def test_aload_precedence():
+    class BModule(Module):
+        @diana.provider
+        def provide_config(self) -> Config:
+            return "b"
+
+    class AModule(Module):
+        requires = (BModule,)
+
+        @diana.provider
+        def provide_config(self) -> Config:
+            return "a"
+
+    injector = diana.Injector()
+    # B starts first, but takes precedence as it's listed last.
+    await injector.aload(AModule(), BModule())
+    assert injector.get(Config) == "b"
+
+
+@pytest.mark.asyncio
+async def test_aunload(lifecycle):
+    events, ConfigModule, PoolModule, CacheModule = lifecycle
+
+    injector = diana.Injector()
+    config, pool = ConfigModule(), PoolModule()
+    await injector.aload(config, pool)
+    events.clear()
+
+    await injector.aunload(config, pool)
+    assert events == ["pool:stop", "config:stop", "pool:unload"]
+    assert injector.modules == []
+    assert injector.providers == {}
+
+
+@pytest.mark.asyncio
+async def test_aload_circular():
+    class AModule(Module):
+        pass
+
+    class BModule(Module):
+        requires = (AModule,)
+
+    AModule.requires = (BModule,)
+
+    with pytest.raises(RuntimeError):
+        await diana.Injector().aload(AModule(), BModule())
+
+
+def test_bind():
+    class AModule(Module):
+        @provider
+        def p_int(self) -> int:
+            return 1
+
+    class MyModule(AModule):
+        pass
+
+    MyModule.bind(int, 2)
+    MyModule.bind(str, "string")
+
+    assert AModule.providers == {int: AModule.p_int}
+    assert MyModule.providers == {}
+    assert MyModule.values == {int: 2, str: "string"}
+
+    @MyModule.provider
+    def p_str(module) -> str:
+        return "provided"
+
+    assert MyModule.values == {int: 2}
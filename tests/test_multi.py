@@ -0,0 +1,145 @@
+import asyncio
+import contextlib
+import typing as t
+
+import pytest
+
+import diana
+
+
+Plugin = t.NewType("Plugin", str)
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def sync_modules(events):
+    class AModule(diana.Module):
+        @diana.provides(Plugin, multi=True)
+        def provide_a(self, suffix=""):
+            return "a" + suffix
+
+        @diana.contextprovider(multi=True)
+        @contextlib.contextmanager
+        def provide_b(self, suffix="") -> Plugin:
+            events.append("enter:b")
+            yield "b" + suffix
+            events.append("exit:b")
+
+    class BModule(diana.Module):
+        pass
+
+    def provide_c(module, suffix="") -> Plugin:
+        return "c" + suffix
+
+    BModule.register(provide_c, multi=True)
+
+    return AModule(), BModule()
+
+
+@pytest.fixture
+def async_module():
+    class CModule(diana.Module):
+        @diana.provider(multi=True)
+        async def provide_d(self, suffix="") -> Plugin:
+            # Only completes if e is resolved concurrently.
+            await asyncio.wait_for(self.e_started.wait(), 1)
+            return "d" + suffix
+
+        @diana.provides(Plugin, context=True, multi=True)
+        @contextlib.asynccontextmanager
+        async def provide_e(self, suffix=""):
+            self.e_started.set()
+            yield "e" + suffix
+
+    return CModule()
+
+
+def test_module_multi_providers(sync_modules):
+    AModule, BModule = map(type, sync_modules)
+    assert AModule.multi_providers == {Plugin: [AModule.provide_a, AModule.provide_b]}
+    assert AModule.providers == {}
+    assert len(BModule.multi_providers[Plugin]) == 1
+
+
+def test_multi(sync_modules, events):
+    injector = diana.Injector()
+    injector.load(*sync_modules)
+
+    @injector
+    @injector.param("plugins", suffix="!")
+    def get_plugins(*, plugins: t.Sequence[Plugin]):
+        events.append("call")
+        return plugins
+
+    assert get_plugins() == ["a!", "b!", "c!"]
+    assert events == ["enter:b", "call", "exit:b"]
+
+    injector.unload(sync_modules[0])
+    assert get_plugins() == ["c!"]
+
+
+def test_multi_frozen(sync_modules):
+    injector = diana.Injector()
+    injector.load(*sync_modules)
+
+    @injector
+    def get_plugins(*, plugins: t.Sequence[Plugin] = ()):
+        return plugins
+
+    assert get_plugins() == ["a", "b", "c"]
+    injector.freeze()
+    assert get_plugins() == ["a", "b", "c"]
+
+
+def test_multi_async_providers(sync_modules, async_module):
+    injector = diana.Injector()
+    injector.load(*sync_modules, async_module)
+
+    with pytest.raises(diana.NoProvider):
+        injector.get(t.Sequence[Plugin])
+
+
+@pytest.mark.asyncio
+async def test_multi_async(sync_modules, async_module, events):
+    # Created in the test, as before Python 3.10 events bind to a loop.
+    async_module.e_started = asyncio.Event()
+    injector = diana.Injector()
+    injector.load(sync_modules[1], async_module, sync_modules[0])
+
+    @injector
+    async def get_plugins(*, plugins: t.Sequence[Plugin]):
+        return plugins
+
+    assert await get_plugins() == ["c", "d", "e", "a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_multi_scope(sync_modules):
+    injector = diana.Injector()
+    injector.load(sync_modules[1])
+
+    @injector
+    def get_plugins(*, plugins: t.Sequence[Plugin]):
+        return plugins
+
+    @injector
+    async def aget_plugins(*, plugins: t.Sequence[Plugin]):
+        return plugins
+
+    assert get_plugins() is not get_plugins()
+    with injector.scope():
+        plugins = get_plugins()
+        assert get_plugins() is plugins
+        assert await aget_plugins() is plugins
+    async with injector.scope():
+        plugins = await aget_plugins()
+        assert await aget_plugins() is plugins
+
+    # Contributions that are contexts are entered per call.
+    injector.load(sync_modules[0])
+    with injector.scope():
+        assert get_plugins() is not get_plugins()
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import contextlib
+import typing as t
+
+import pytest
+
+import diana
+
+
+Frob = t.NewType("Frob", str)
+
+
+@pytest.fixture
+def injector():
+    class FrobModule(diana.Module):
+        @diana.provider
+        def provide(self) -> Frob:
+            return Frob("real")
+
+        @diana.provider
+        async def provide_async(self) -> Frob:
+            return Frob("real-async")
+
+    injector = diana.Injector()
+    injector.load(FrobModule())
+    return injector
+
+
+def test_override_value(injector):
+    @injector
+    def get_frob(*, frob: Frob):
+        return frob
+
+    with injector.override({Frob: "fake"}):
+        assert get_frob() == "fake"
+        with injector.override({Frob: "faker"}):
+            assert get_frob() == "faker"
+        assert get_frob() == "fake"
+
+    assert get_frob() == "real"
+
+
+def test_override_provider(injector):
+    @diana.contextprovider
+    @contextlib.contextmanager
+    def fake(module, prefix="") -> Frob:
+        assert module is override
+        yield prefix + "fake"
+
+    @injector
+    @injector.param("frob", prefix="a-")
+    def get_frob(*, frob: Frob):
+        return frob
+
+    override = injector.override({Frob: fake})
+    with override:
+        assert get_frob() == "a-fake"
+
+
+def test_override_refresh(injector, tmp_path):
+    Table = t.NewType("Table", memoryview)
+
+    @diana.provider
+    @diana.refresh(ttl=10)
+    def fake(module) -> Frob:
+        return "fake"
+
+    @diana.sharedprovider(directory=str(tmp_path))
+    def table(module) -> Table:
+        return b"table"
+
+    with injector.override({Frob: fake, Table: table}):
+        assert injector.get(Frob) == "fake"
+        assert bytes(injector.get(Table)) == b"table"
+
+
+def test_override_thread_local(injector):
+    entered = threading.Event()
+    done = threading.Event()
+    seen = []
+
+    def other_thread():
+        entered.wait()
+        seen.append(injector.get(Frob))
+        done.set()
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    with injector.override({Frob: "fake"}):
+        entered.set()
+        done.wait()
+        assert injector.get(Frob) == "fake"
+    thread.join()
+
+    assert seen == ["real"]
+
+
+@pytest.mark.asyncio
+async def test_override_async(injector):
+    @injector
+    async def get_frob(*, frob: Frob):
+        return frob
+
+    async def fake(module) -> Frob:
+        return "fake-async"
+
+    async def overridden(value):
+        async with injector.override({Frob: value}):
+            await asyncio.sleep(0)
+            return await get_frob()
+
+    results = await asyncio.gather(
+        overridden("fake"), overridden(diana.provider(fake)), get_frob()
+    )
+    assert results == ["fake", "fake-async", "real-async"]
+
+
+@pytest.mark.asyncio
+async def test_override_shared(injector):
+    @injector
+    async def get_frob(*, frob: Frob):
+        return frob
+
+    override = injector.override({Frob: "fake"})
+    entered = asyncio.Event()
+
+    async def first():
+        with override:
+            await entered.wait()
+            return await get_frob()
+
+    async def second():
+        with override:
+            entered.set()
+            await asyncio.sleep(0)
+            frob = await get_frob()
+        return frob, await get_frob()
+
+    assert await asyncio.gather(first(), second()) == ["fake", ("fake", "real-async")]
@@ -0,0 +1,209 @@
+import time
+import asyncio
+import contextlib
+import typing as t
+
+import pytest
+
+import diana
+
+
+Flags = t.NewType("Flags", dict)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def fetches():
+    return []
+
+
+@pytest.fixture
+def sync_injector(clock, fetches):
+    class FlagsModule(diana.Module):
+        fail = False
+
+        @diana.provider
+        @diana.refresh(ttl=10, jitter=0, backoff=5, clock=clock)
+        def provide_flags(self, tenant="default") -> Flags:
+            fetches.append(tenant)
+            if self.fail:
+                raise ValueError()
+            return {"tenant": tenant, "version": len(fetches)}
+
+    injector = diana.Injector()
+    injector.load(FlagsModule())
+    return injector
+
+
+@pytest.fixture
+def async_injector(clock, fetches):
+    class FlagsModule(diana.Module):
+        fail = False
+
+        @diana.provider
+        @diana.refresh(ttl=10, jitter=0, backoff=5, clock=clock)
+        async def provide_flags(self, tenant="default") -> Flags:
+            await asyncio.sleep(0)
+            fetches.append(tenant)
+            if self.fail:
+                raise ValueError()
+            return {"tenant": tenant, "version": len(fetches)}
+
+    injector = diana.Injector()
+    injector.load(FlagsModule())
+    return injector
+
+
+def wait_for(predicate):
+    deadline = time.monotonic() + 1
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_refresh(sync_injector, clock, fetches):
+    @sync_injector
+    def get_flags(*, flags: Flags):
+        return flags
+
+    assert get_flags()["version"] == 1
+    assert get_flags()["version"] == 1
+    assert fetches == ["default"]
+
+    clock.now = 11
+    # Served stale while refreshing in the background.
+    assert get_flags()["version"] == 1
+    wait_for(lambda: get_flags()["version"] == 2)
+    assert fetches == ["default", "default"]
+
+
+def test_refresh_params(sync_injector, fetches):
+    @sync_injector
+    @sync_injector.param("flags", tenant="other")
+    def get_flags(*, flags: Flags):
+        return flags
+
+    assert get_flags()["tenant"] == "other"
+    assert sync_injector.get(Flags)["tenant"] == "default"
+    assert fetches == ["other", "default"]
+
+
+def test_refresh_failure(sync_injector, clock, fetches):
+    module = sync_injector.modules[0]
+    cache = module.provide_flags.__refresh__
+
+    assert sync_injector.get(Flags)["version"] == 1
+
+    module.fail = True
+    clock.now = 11
+    assert sync_injector.get(Flags)["version"] == 1
+    wait_for(lambda: cache.failures == 1)
+
+    # Backing off, the last good value is served without refreshing.
+    clock.now = 12
+    assert sync_injector.get(Flags)["version"] == 1
+    assert len(fetches) == 2
+
+    module.fail = False
+    clock.now = 16
+    sync_injector.get(Flags)
+    wait_for(lambda: sync_injector.get(Flags)["version"] == 3)
+
+    stats = cache.stats()
+    assert stats["refreshes"] == 2
+    assert stats["failures"] == 1
+    assert stats["max_staleness"] == 0
+    assert cache.staleness(module) == 0
+
+
+def test_refresh_first_failure(sync_injector, fetches):
+    sync_injector.modules[0].fail = True
+    with pytest.raises(ValueError):
+        sync_injector.get(Flags)
+
+
+def test_refresh_context():
+    with pytest.raises(TypeError):
+
+        @diana.refresh(ttl=1)
+        @contextlib.contextmanager
+        def provide(self):
+            yield
+
+
+@pytest.mark.asyncio
+async def test_refresh_async(async_injector, clock, fetches):
+    @async_injector
+    async def get_flags(*, flags: Flags):
+        return flags
+
+    results = await asyncio.gather(get_flags(), get_flags())
+    assert [r["version"] for r in results] == [1, 1]
+    assert fetches == ["default"]
+
+    clock.now = 11
+    assert (await get_flags())["version"] == 1
+    assert (await get_flags())["version"] == 1
+    await asyncio.sleep(0.01)
+    assert (await get_flags())["version"] == 2
+    assert fetches == ["default", "default"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_cancelled(clock):
+    fetches = []
+
+    class FlagsModule(diana.Module):
+        @diana.provider
+        @diana.refresh(ttl=10, jitter=0, clock=clock)
+        async def provide_flags(self) -> Flags:
+            fetches.append(clock.now)
+            if len(fetches) > 1 and clock.now < 20:
+                await asyncio.sleep(1)
+            return {"version": len(fetches)}
+
+    injector = diana.Injector()
+    injector.load(FlagsModule())
+
+    @injector
+    async def get_flags(*, flags: Flags):
+        return flags
+
+    def cancel_refresh():
+        # As when the loop shuts down, e.g. at the end of `asyncio.run`.
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+
+    assert (await get_flags())["version"] == 1
+
+    clock.now = 11
+    # Cancelled before it starts.
+    await get_flags()
+    cancel_refresh()
+    await asyncio.sleep(0.01)
+    assert fetches == [0]
+
+    # Cancelled once it started.
+    await get_flags()
+    await asyncio.sleep(0)
+    cancel_refresh()
+    await asyncio.sleep(0.01)
+    assert fetches == [0, 11]
+
+    clock.now = 21
+    await get_flags()
+    await asyncio.sleep(0.01)
+    assert (await get_flags())["version"] == 3
@@ -0,0 +1,101 @@
+import time
+import asyncio
+import typing as t
+
+import pytest
+
+import diana
+from diana.sampling import Sampler, bucket, BUCKETS, OTHER
+
+
+Dependency = t.NewType("Dependency", str)
+
+
+@pytest.fixture
+def injector():
+    class SlowModule(diana.Module):
+        @diana.provider
+        def provide(self) -> Dependency:
+            time.sleep(0.002)
+            return "dependency"
+
+    injector = diana.Injector()
+    injector.load(SlowModule())
+    return injector
+
+
+def test_bucket():
+    assert bucket(0) == 0
+    assert bucket(0.000001) == 1
+    assert bucket(0.001) == 10
+    assert bucket(3600) == BUCKETS - 1
+
+
+def test_sample(injector):
+    sampler = injector.sample(every=2)
+
+    @injector
+    def target(*, dep: Dependency):
+        time.sleep(0.01)
+        return dep
+
+    for _ in range(4):
+        assert target() == "dependency"
+
+    functions = sampler.snapshot()["functions"]
+    stats = functions[target.__module__ + "." + target.__qualname__]
+    assert stats["calls"] == 2
+    assert sum(stats["inner"]["buckets"]) == 2
+    assert 0.02 <= stats["inner"]["total"]
+    assert 0.004 <= stats["overhead"]["total"] < stats["inner"]["total"]
+
+    injector.sampler = None
+    target()
+    assert sampler.snapshot()["functions"] == functions
+
+
+@pytest.mark.asyncio
+async def test_sample_async(injector):
+    sampler = injector.sample(every=1)
+
+    @injector
+    async def target(*, dep: Dependency):
+        await asyncio.sleep(0.01)
+        return dep
+
+    assert await target() == "dependency"
+
+    (stats,) = sampler.snapshot()["functions"].values()
+    assert stats["calls"] == 1
+    assert stats["inner"]["total"] >= 0.01
+
+
+def test_export():
+    now = [0.0]
+    exported = []
+    sampler = Sampler(
+        every=1, export=exported.append, interval=10, clock=lambda: now[0]
+    )
+
+    sampler.record("a", 0.1, 1.0)
+    assert exported == []
+
+    now[0] = 10
+    sampler.record("a", 0.1, 1.0)
+    assert exported[0]["functions"]["a"]["calls"] == 2
+    assert sampler.snapshot()["functions"] == {}
+
+    sampler.record("b", 0.1, 1.0)
+    sampler.flush()
+    assert list(exported[1]["functions"]) == ["b"]
+
+
+def test_max_functions():
+    sampler = Sampler(max_functions=1)
+    sampler.record("a", 0.1, 1.0)
+    sampler.record("b", 0.1, 1.0)
+    sampler.record("c", 0.1, 1.0)
+
+    functions = sampler.snapshot()["functions"]
+    assert functions["a"]["calls"] == 1
+    assert functions[OTHER]["calls"] == 2
@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import diana
+
+
+Client = t.NewType("Client", object)
+AsyncClient = t.NewType("AsyncClient", object)
+Session = t.NewType("Session", object)
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def injector(calls):
+    class ClientModule(diana.Module):
+        @diana.provider
+        def provide_client(self, name="default") -> Client:
+            return object()
+
+        @diana.provider
+        async def provide_async_client(self, tags=()) -> AsyncClient:
+            calls.append(AsyncClient)
+            await asyncio.sleep(0)
+            return object()
+
+        @diana.contextprovider
+        @contextlib.contextmanager
+        def provide_session(self) -> Session:
+            yield object()
+
+    injector = diana.Injector()
+    injector.load(ClientModule())
+    return injector
+
+
+def test_scope(injector):
+    @injector
+    def target(*, client: Client, session: Session):
+        return client, session
+
+    assert target()[0] is not target()[0]
+
+    with injector.scope():
+        (client, session), (client2, session2) = target(), target()
+        assert client is client2
+        # Contexts are entered per call.
+        assert session is not session2
+
+        assert injector.get(Client, {"name": "other"}) is not client
+
+    assert target()[0] is not client
+
+
+def test_nested_scope(injector):
+    with injector.scope():
+        outer = injector.get(Client)
+        with injector.scope():
+            assert injector.get(Client) is outer
+            inner = injector.get(Client, {"name": "inner"})
+            assert injector.get(Client, {"name": "inner"}) is inner
+        assert injector.get(Client, {"name": "inner"}) is not inner
+
+
+def test_submit(injector):
+    @injector
+    def target(*, client: Client):
+        return client
+
+    with ThreadPoolExecutor(2) as pool, injector.scope():
+        client = target()
+        futures = [injector.submit(pool, target) for _ in range(4)]
+        assert all(f.result() is client for f in futures)
+
+        assert pool.submit(target).result() is not client
+
+
+@pytest.mark.asyncio
+async def test_unhashable_params(injector):
+    @injector
+    @injector.param("client", name=["x"])
+    @injector.param("async_client", tags=["x"])
+    async def target(*, client: Client, async_client: AsyncClient):
+        return client, async_client
+
+    with injector.scope():
+        first, second = await target(), await target()
+
+    # Resolved as they are outside scopes, without being kept.
+    assert first[0] is not second[0]
+    assert first[1] is not second[1]
+
+
+def test_frozen(injector):
+    @injector
+    def target(*, client: Client):
+        return client
+
+    injector.freeze()
+    with injector.scope():
+        assert target() is target()
+
+
+@pytest.mark.asyncio
+async def test_tasks(injector):
+    @injector
+    async def target(*, client: Client, async_client: AsyncClient):
+        return client, async_client
+
+    async with injector.scope():
+        parent = await target()
+        assert await injector.create_task(target()) == parent
+        assert await injector.gather(target(), target()) == [parent, parent]
+        assert await injector.run_in_executor(None, injector.get, Client) is parent[0]
+
+
+@pytest.mark.asyncio
+async def test_gather_scope(injector, calls):
+    @injector
+    async def target(*, async_client: AsyncClient):
+        return async_client
+
+    # Without a scope, the awaitables share a new one.
+    first, *others = await injector.gather(*(target() for _ in range(5)))
+    assert all(other is first for other in others)
+    # The concurrent calls share the provider's call.
+    assert calls == [AsyncClient]
+    assert await target() is not first
+
+
+@pytest.mark.asyncio
+async def test_fallback_not_kept():
+    delays = [1, 0]
+
+    class SlowModule(diana.Module):
+        @diana.provider(timeout=0.01, timeout_fallback=True)
+        async def provide_async_client(self) -> AsyncClient:
+            await asyncio.sleep(delays.pop(0))
+            return "provided"
+
+        @diana.provider
+        def provide_client(self) -> AsyncClient:
+            return "fallback"
+
+    injector = diana.Injector()
+    injector.load(SlowModule())
+
+    @injector
+    async def target(*, client: AsyncClient):
+        return client
+
+    async with injector.scope():
+        assert await target() == "fallback"
+        assert await target() == "provided"
+        assert await target() == "provided"
+    assert delays == []
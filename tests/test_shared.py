@@ -0,0 +1,125 @@
+import os
+import stat
+import array
+import tempfile
+import typing as t
+
+import pytest
+
+import diana
+from diana import shared
+
+
+Table = t.NewType("Table", memoryview)
+
+
+@pytest.fixture
+def builds():
+    return []
+
+
+@pytest.fixture
+def module_class(tmp_path, builds):
+    class TableModule(diana.Module):
+        @diana.sharedprovider(directory=str(tmp_path), version=1)
+        def provide_table(self) -> Table:
+            builds.append(self)
+            return array.array("i", range(10))
+
+    return TableModule
+
+
+def test_shared(module_class, builds):
+    injector = diana.Injector()
+    injector.load(module_class())
+
+    @injector
+    def lookup(index, *, table: Table):
+        return table.cast("i")[index]
+
+    assert lookup(3) == 3
+    assert lookup(9) == 9
+    assert len(builds) == 1
+
+    resource = module_class.provide_table.__shared__
+    assert os.path.exists(resource.path)
+    assert resource.path.endswith("-1.bin")
+    assert injector.get(Table).readonly
+
+
+def test_shared_between_workers(module_class, builds):
+    # Each injector stands in for a worker process.
+    first, second = diana.Injector(), diana.Injector()
+    first.load(module_class())
+    second.load(module_class())
+
+    assert first.get(Table) == second.get(Table)
+    assert len(builds) == 1
+
+
+def test_release(module_class):
+    module = module_class()
+    injector = diana.Injector()
+    injector.load(module)
+
+    view = injector.get(Table)
+    resource = module_class.provide_table.__shared__
+
+    injector.unload(module)
+    with pytest.raises(ValueError):
+        view[0]
+
+    # Mapped again when reloaded, without rebuilding.
+    injector.load(module)
+    assert injector.get(Table).cast("i")[1] == 1
+
+    resource.remove()
+    assert not os.path.exists(resource.path)
+
+
+def test_empty(tmp_path):
+    class EmptyModule(diana.Module):
+        @diana.sharedprovider(directory=str(tmp_path))
+        def provide_table(self) -> Table:
+            return b""
+
+    injector = diana.Injector()
+    injector.load(EmptyModule())
+    assert len(injector.get(Table)) == 0
+
+
+def test_async_build():
+    with pytest.raises(TypeError):
+
+        @diana.sharedprovider
+        async def provide_table(self) -> Table:
+            pass
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX only")
+def test_default_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    class DefaultModule(diana.Module):
+        @diana.sharedprovider
+        def provide_table(self) -> Table:
+            return b"abc"
+
+    injector = diana.Injector()
+    injector.load(DefaultModule())
+    assert bytes(injector.get(Table)) == b"abc"
+
+    directory = shared.default_directory()
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX only")
+def test_default_directory_not_private(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    planted = tmp_path / "diana-shared-{}".format(os.getuid())
+    planted.mkdir()
+    planted.chmod(0o777)
+
+    with pytest.raises(PermissionError):
+        shared.default_directory()
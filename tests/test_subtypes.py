@@ -0,0 +1,147 @@
+import typing as t
+
+import pytest
+
+import diana
+from diana.subtypes import provides_for
+
+if hasattr(t, "Protocol"):
+    Protocol = t.Protocol
+else:  # Python 3.7
+    Protocol = pytest.importorskip("typing_extensions").Protocol
+
+
+class Storage(object):
+    pass
+
+
+class DiskStorage(Storage):
+    pass
+
+
+class MemoryStorage(Storage):
+    pass
+
+
+class Closeable(Protocol):
+    def close(self):
+        ...
+
+
+class Connection(object):
+    def close(self):
+        pass
+
+
+class DiskModule(diana.Module):
+    @diana.provider
+    def provide_disk(self) -> DiskStorage:
+        return DiskStorage()
+
+    @diana.provider
+    def provide_connection(self) -> Connection:
+        return Connection()
+
+
+class MemoryModule(diana.Module):
+    @diana.provider
+    async def provide_memory(self) -> MemoryStorage:
+        return MemoryStorage()
+
+    @diana.provider
+    def provide_memory_sync(self) -> MemoryStorage:
+        return MemoryStorage()
+
+
+def test_provides_for():
+    assert provides_for(DiskStorage, Storage)
+    assert not provides_for(Storage, DiskStorage)
+    assert provides_for(Connection, Closeable)
+    assert not provides_for(DiskStorage, Closeable)
+    assert not provides_for(t.NewType("Disk", str), Storage)
+
+
+def test_disabled():
+    injector = diana.Injector()
+    injector.load(DiskModule())
+
+    with pytest.raises(diana.NoProvider):
+        injector.get(Storage)
+
+
+def test_subtypes():
+    injector = diana.Injector(subtypes=True)
+    disk, memory = DiskModule(), MemoryModule()
+    injector.load(disk)
+
+    @injector
+    def target(*, storage: Storage, closeable: Closeable):
+        return storage, closeable
+
+    storage, closeable = target()
+    assert isinstance(storage, DiskStorage)
+    assert isinstance(closeable, Connection)
+
+    # Later modules take precedence.
+    injector.load(memory)
+    assert isinstance(target()[0], MemoryStorage)
+
+    injector.unload(memory)
+    assert isinstance(target()[0], DiskStorage)
+
+    injector.unload(disk)
+    with pytest.raises(diana.NoProvider):
+        target()
+
+
+def test_subtypes_exact_precedence():
+    class StorageModule(diana.Module):
+        @diana.provider
+        def provide_storage(self) -> Storage:
+            return Storage()
+
+    injector = diana.Injector(subtypes=True)
+    injector.load(StorageModule(), DiskModule())
+    assert type(injector.get(Storage)) is Storage
+
+
+@pytest.mark.asyncio
+async def test_subtypes_async():
+    injector = diana.Injector(subtypes=True)
+    injector.load(MemoryModule())
+
+    @injector
+    async def target(*, storage: Storage):
+        return storage
+
+    assert isinstance(await target(), MemoryStorage)
+
+
+def test_subtypes_frozen():
+    injector = diana.Injector(subtypes=True)
+    injector.load(DiskModule())
+
+    @injector
+    def target(*, storage: Storage = None, closeable: Closeable):
+        return storage, closeable
+
+    injector.freeze()
+    assert target.__dependencies__._frozen_plan is not None
+    storage, closeable = target()
+    assert isinstance(storage, DiskStorage)
+    assert isinstance(closeable, Connection)
+
+
+@pytest.mark.asyncio
+async def test_subtypes_frozen_async():
+    injector = diana.Injector(subtypes=True)
+    injector.load(DiskModule(), MemoryModule())
+
+    @injector
+    async def target(*, storage: Storage = None, closeable: Closeable = None):
+        return storage, closeable
+
+    injector.freeze()
+    storage, closeable = await target()
+    assert isinstance(storage, MemoryStorage)
+    assert isinstance(closeable, Connection)
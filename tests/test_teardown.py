@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import contextlib
+import typing as t
+
+import pytest
+
+import diana
+from diana.teardown import Teardown
+
+
+Buffer = t.NewType("Buffer", list)
+AsyncBuffer = t.NewType("AsyncBuffer", list)
+
+
+@pytest.fixture
+def release():
+    return threading.Event()
+
+
+@pytest.fixture
+def flushed():
+    return []
+
+
+@pytest.fixture
+def injector(release, flushed):
+    class BufferModule(diana.Module):
+        @diana.contextprovider(deferred_exit=True)
+        @contextlib.contextmanager
+        def provide_buffer(self) -> Buffer:
+            buffer = []
+            try:
+                yield buffer
+            finally:
+                release.wait(1)
+                flushed.append(buffer)
+
+        @diana.contextprovider(deferred_exit=True)
+        @contextlib.asynccontextmanager
+        async def provide_async_buffer(self) -> AsyncBuffer:
+            buffer = []
+            try:
+                yield buffer
+            finally:
+                await asyncio.sleep(0.01)
+                flushed.append(buffer)
+
+    injector = diana.Injector()
+    injector.load(BufferModule())
+    return injector
+
+
+def test_deferred_exit(injector, release, flushed):
+    @injector
+    def write(*, buffer: Buffer):
+        buffer.append("data")
+        return "done"
+
+    assert write() == "done"
+    assert flushed == []
+    assert injector.teardown.pending == 1
+
+    release.set()
+    assert injector.teardown.drain(1)
+    assert flushed == [["data"]]
+    assert injector.teardown.pending == 0
+
+
+def test_deferred_exit_error(injector, release, flushed):
+    @injector
+    def write(*, buffer: Buffer):
+        raise ValueError()
+
+    release.set()
+    with pytest.raises(ValueError):
+        write()
+
+    # Exited in place, so the context sees the error.
+    assert flushed == [[]]
+    assert injector.teardown.pending == 0
+
+
+def test_bounded(injector, release, flushed):
+    injector.teardown.max_pending = 1
+
+    @injector
+    def write(*, buffer: Buffer):
+        buffer.append("data")
+
+    threading.Timer(0.05, release.set).start()
+    write()
+    write()
+
+    # The second exit couldn't be queued, so waited for the release.
+    assert len(flushed) >= 1
+    assert injector.teardown.drain(1)
+    assert len(flushed) == 2
+
+
+@pytest.mark.asyncio
+async def test_deferred_exit_async(injector, flushed):
+    @injector
+    async def write(*, buffer: AsyncBuffer):
+        buffer.append("data")
+        return "done"
+
+    assert await write() == "done"
+    assert flushed == []
+    assert injector.teardown.pending == 1
+
+    assert await injector.teardown.adrain(1)
+    assert flushed == [["data"]]
+
+
+@pytest.mark.asyncio
+async def test_aunload_drains(injector, release, flushed):
+    @injector
+    async def write(*, buffer: AsyncBuffer, sync_buffer: Buffer):
+        pass
+
+    await write()
+    release.set()
+    await injector.aunload(*injector.modules)
+    assert len(flushed) == 2
+
+
+def test_unload_drains(injector, release, flushed):
+    @injector
+    def write(*, buffer: Buffer):
+        pass
+
+    class Module(diana.Module):
+        def unload(self, injector):
+            events.append(list(flushed))
+
+    events = []
+    injector.load(Module())
+    write()
+    threading.Timer(0.05, release.set).start()
+    injector.unload(*injector.modules)
+    assert events == [[[]]]
+
+
+def test_error_hook():
+    errors = []
+    teardown = Teardown(on_error=lambda exc, cm: errors.append(exc))
+
+    class Failing(object):
+        def __exit__(self, *exc_info):
+            raise ValueError()
+
+    assert teardown.defer(Failing())
+    assert teardown.drain(1)
+    assert teardown.failures == 1
+    assert isinstance(errors[0], ValueError)
+
+
+def test_deferred_exit_requires_context():
+    with pytest.raises(ValueError):
+
+        @diana.provider(deferred_exit=True)
+        def provide(self) -> Buffer:
+            pass
@@ -0,0 +1,155 @@
+import asyncio
+import contextlib
+import typing as t
+
+import pytest
+
+import diana
+
+
+Slow = t.NewType("Slow", str)
+SlowContext = t.NewType("SlowContext", str)
+Fallback = t.NewType("Fallback", str)
+Failing = t.NewType("Failing", str)
+FailingContext = t.NewType("FailingContext", str)
+
+
+@pytest.fixture
+def injector():
+    class SlowModule(diana.Module):
+        @diana.provider
+        async def provide_slow(self, delay=1) -> Slow:
+            await asyncio.sleep(delay)
+            return "slow"
+
+        @diana.contextprovider(timeout=0.01)
+        @contextlib.asynccontextmanager
+        async def provide_slow_context(self, delay=1) -> SlowContext:
+            await asyncio.sleep(delay)
+            yield "slow"
+
+        @diana.provider(timeout=0.01, timeout_fallback=True)
+        async def provide_fallback(self) -> Fallback:
+            await asyncio.sleep(1)
+            return "slow"
+
+        @diana.provider
+        def provide_fallback_sync(self) -> Fallback:
+            return "fallback"
+
+        @diana.provider(timeout=1)
+        async def provide_failing(self) -> Failing:
+            raise asyncio.TimeoutError("from the provider")
+
+        @diana.contextprovider(timeout=1)
+        @contextlib.asynccontextmanager
+        async def provide_failing_context(self) -> FailingContext:
+            raise asyncio.TimeoutError("from the provider")
+            yield
+
+    injector = diana.Injector()
+    injector.load(SlowModule())
+    return injector
+
+
+@pytest.fixture(params=[False, True], ids=["mutable", "frozen"])
+def frozen(request):
+    return request.param
+
+
+def maybe_freeze(injector, frozen):
+    if frozen:
+        injector.freeze()
+
+
+@pytest.mark.asyncio
+async def test_call_timeout(injector, frozen):
+    @injector
+    @injector.timeout("slow", 0.01)
+    async def get_slow(*, slow: Slow):
+        return slow
+
+    maybe_freeze(injector, frozen)
+
+    with pytest.raises(diana.ProviderTimeout) as exc_info:
+        await get_slow()
+    assert exc_info.value.feature is Slow
+    assert injector.timeout_counts[Slow] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_timeout_default(injector, frozen):
+    @injector
+    @injector.timeout("slow", 0.01, fallback=True)
+    async def get_slow(*, slow: Slow = "default"):
+        return slow
+
+    @injector
+    @injector.timeout("slow", 1)
+    @injector.param("slow", delay=0)
+    async def get_fast(*, slow: Slow):
+        return slow
+
+    maybe_freeze(injector, frozen)
+
+    assert await get_slow() == "default"
+    assert await get_fast() == "slow"
+
+
+@pytest.mark.asyncio
+async def test_provider_timeout(injector, frozen):
+    @injector
+    async def get_context(*, slow: SlowContext):
+        return slow
+
+    @injector
+    async def get_fallback(*, value: Fallback):
+        return value
+
+    maybe_freeze(injector, frozen)
+
+    with pytest.raises(diana.ProviderTimeout):
+        await get_context()
+    assert await get_fallback() == "fallback"
+    assert injector.timeout_counts == {SlowContext: 1, Fallback: 1}
+
+
+@pytest.mark.asyncio
+async def test_provider_raises_timeout(injector, frozen):
+    @injector
+    async def get_failing(*, value: Failing):
+        return value
+
+    @injector
+    async def get_failing_context(*, value: FailingContext):
+        return value
+
+    maybe_freeze(injector, frozen)
+
+    for func in (get_failing, get_failing_context):
+        with pytest.raises(asyncio.TimeoutError) as exc_info:
+            await func()
+        assert not isinstance(exc_info.value, diana.ProviderTimeout)
+    assert injector.timeout_counts == {}
+
+
+@pytest.mark.asyncio
+async def test_deadline(injector, frozen):
+    @injector
+    async def get_slow(*, slow: Slow):
+        return slow
+
+    maybe_freeze(injector, frozen)
+
+    async def handle():
+        with diana.deadline(0.01):
+            await asyncio.sleep(0)
+            return await get_slow()
+
+    with pytest.raises(diana.ProviderTimeout):
+        await asyncio.gather(handle(), get_slow(slow="explicit"))
+
+    with diana.deadline(5):
+        with diana.deadline(10):
+            assert 4 < diana.timeout.remaining() <= 5
+    assert diana.timeout.remaining() is None